@@ -0,0 +1,217 @@
+import json
+import re
+import time
+
+from db import get_db_connection, run_in_transaction
+from dedup import index_resume, minhash
+from document import analyze
+from extraction import content_hash, extract_text_cached
+from jd_library import hash_jd_text, load_jd
+from metrics import StageTimer
+from scoring import get_model, pack_counts, skill_diff, unpack_counts
+from skills import get_matcher, skill_match
+
+
+SCORE_CACHE_MAX_ENTRIES = 10000  # least recently used analyses are evicted past this
+
+EXPERIENCE_PATTERN = re.compile(r'(\d+)\s*(?:year|yr)s?')
+
+
+def experience_years(doc):
+    """Sum of every "N years" mention in the document, or None if there are none."""
+    years = EXPERIENCE_PATTERN.findall(doc.text)
+    return sum(int(y) for y in years) if years else None
+
+
+def prepare_jd(model, jd_text):
+    """Everything score_resume needs from a JD, computed once so it can be reused across resumes."""
+    doc = analyze(jd_text)
+    jd_vec, jd_terms = model.vectorize_doc(doc)
+    return jd_vec, jd_terms, get_matcher().find_doc(doc)
+
+
+def score_resume(model, text, jd_text, jd=None):
+    """Score resume text against a JD; returns (result, resume_counts, signature).
+
+    `resume_counts` (unweighted hashed term counts) and `signature` (MinHash) are
+    what save_resume stores alongside the result.
+    `jd` may be a precomputed prepare_jd(model, jd_text), to reuse across many resumes.
+    """
+    score = 0.0
+    matched_skills_list = []
+    missing_skills = []
+    skills_matched = "0/0"
+    experience = "Not specified"
+    keywords = 0
+    resume_counts = None
+    signature = None
+    if text:
+        # Every extractor below reads the same analysed document; the text is processed once
+        doc = analyze(text)
+        signature = minhash(doc)
+    if text and jd_text:
+        # IDF comes from the whole stored corpus, so scores are comparable across requests
+        resume_counts, _ = model.count_doc(doc)
+        resume_vec = model.weight(resume_counts)
+        jd_vec, jd_terms, jd_skills = jd or prepare_jd(model, jd_text)
+        score = max(0.0, resume_vec.multiply(jd_vec).sum()) * 100
+
+        if jd_skills:
+            matched_skills_list, missing_skills = skill_match(get_matcher().find_doc(doc), jd_skills)
+        else:
+            # JD names nothing from the taxonomy; fall back to its weighted terms
+            matched_skills_list, missing_skills = skill_diff(resume_vec, jd_vec, jd_terms)
+
+        total_skills = len(matched_skills_list) + len(missing_skills)
+        skills_matched = f"{len(matched_skills_list)}/{total_skills}" if total_skills > 0 else "0/0"
+        keywords = (len(matched_skills_list) / total_skills * 100) if total_skills > 0 else 0
+
+        total_exp = experience_years(doc)
+        if total_exp is not None:
+            experience = f"{total_exp} years"
+
+    result = {
+        'score': score,
+        'skills_matched': skills_matched,
+        'matched_skills_list': matched_skills_list,
+        'missing_skills': missing_skills,
+        'experience': experience,
+        'keywords': keywords
+    }
+    return result, resume_counts, signature
+
+
+def save_resume(conn, model, user_id, filename, text, jd_text, result, resume_counts, signature=None, candidate=None,
+                uploaded_by=None):
+    """Insert a scored resume; call inside run_in_transaction.
+
+    Returns (file id, the add_document() columns or None); pass the columns to
+    model.apply_added() once the transaction has committed. Bulk imports pass user_id=None, the (name, email) `candidate` it belongs to and
+    the officer who imported it as `uploaded_by`.
+    """
+    name, email = candidate or (None, None)
+    cur = conn.execute(
+        'INSERT INTO files (user_id, filename, file_type, analysis_score, metadata, candidate_name, candidate_email, uploaded_by) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (user_id, filename, 'resume', result['score'], json.dumps({'text': text[:500], 'jd_text': jd_text[:500], 'matched_skills': result['matched_skills_list'], 'missing_skills': result['missing_skills']}),
+         name, email, uploaded_by)
+    )
+    # Counts are kept so the resume can be matched again later without re-analysing it
+    cols, counts = pack_counts(resume_counts) if resume_counts is not None else (None, None)
+    conn.execute('INSERT INTO resume_text (file_id, text, cols, counts) VALUES (?, ?, ?, ?)', (cur.lastrowid, text, cols, counts))
+    added = model.add_document(conn, resume_counts) if resume_counts is not None else None
+    if signature is not None:
+        index_resume(conn, cur.lastrowid, signature)
+    return cur.lastrowid, added
+
+
+def load_resume_counts(conn, model, file_id):
+    """Stored term counts of a saved resume, or None if it has no text."""
+    row = conn.execute('''
+        SELECT t.cols, t.counts, t.text AS full_text, f.metadata
+        FROM files f LEFT JOIN resume_text t ON t.file_id = f.id
+        WHERE f.id = ?
+    ''', (file_id,)).fetchone()
+    if row is None:
+        return None
+    if row['cols'] is not None:
+        return unpack_counts([(row['cols'], row['counts'])])
+    # Saved before counts were stored; rebuild them from the text (never the original file)
+    text = row['full_text'] or json.loads(row['metadata'])['text']
+    return model.count_doc(analyze(text))[0] if text else None
+
+
+def cached_result(conn, user_id, resume_hash, jd_hash):
+    """The stored result of an identical earlier analysis by this user, or None."""
+    row = conn.execute('''
+        SELECT c.result FROM score_cache c JOIN files f ON f.id = c.file_id
+        WHERE c.user_id = ? AND c.resume_hash = ? AND c.jd_hash = ?
+    ''', (user_id, resume_hash, jd_hash)).fetchone()
+    if row is None:
+        return None
+    conn.execute('UPDATE score_cache SET last_used = ? WHERE user_id = ? AND resume_hash = ? AND jd_hash = ?',
+                 (time.time(), user_id, resume_hash, jd_hash))
+    conn.commit()
+    return json.loads(row[0])
+
+
+def store_result(conn, user_id, resume_hash, jd_hash, file_id, result):
+    """Remember an analysis, evicting the least recently used past the cap; the caller commits."""
+    conn.execute(
+        'INSERT OR REPLACE INTO score_cache (user_id, resume_hash, jd_hash, file_id, result, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+        (user_id, resume_hash, jd_hash, file_id, json.dumps(result), time.time())
+    )
+    conn.execute(
+        'DELETE FROM score_cache WHERE rowid IN (SELECT rowid FROM score_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+        (SCORE_CACHE_MAX_ENTRIES,)
+    )
+
+
+def analyze_resume(user_id, filename, data, jd_text, jd_filename=None, jd_data=None, progress=None, jd_id=None):
+    """Extract, score and store one resume against a JD; returns the values the Dashboard displays.
+
+    The JD is `jd_id` from the published library if given, else `jd_data` or `jd_text`.
+    Re-analysing the same file against the same JD returns the stored result
+    without re-running the pipeline or adding another row.
+    `progress`, if given, is called with a percentage as each stage finishes.
+    """
+    progress = progress or (lambda pct: None)
+    timer = StageTimer(file_size=len(data))
+
+    conn = get_db_connection()
+    try:
+        model = get_model(conn)
+        jd = None
+        if jd_id is not None:
+            # Published JDs are already extracted and vectorised
+            published = load_jd(conn, model, jd_id)
+            if published is None:
+                raise ValueError("That job description is no longer available")
+            jd_text, jd_hash, jd = published
+        else:
+            if jd_data is not None:
+                with timer.stage('extract_jd'):
+                    jd_text = extract_text_cached(conn, jd_data, jd_filename)
+            jd_hash = hash_jd_text(jd_text)
+        progress(40)
+        resume_hash = content_hash(data)
+        with timer.stage('score_cache'):
+            result = cached_result(conn, user_id, resume_hash, jd_hash)
+        if result is not None:
+            run_in_transaction(timer.save)
+            progress(100)
+            return result
+
+        extract_stats = {}
+        with timer.stage('extract_resume'):
+            text = extract_text_cached(conn, data, filename, extract_stats)
+        timer.page_count = extract_stats.get('pages')
+        progress(60)
+    finally:
+        conn.close()
+    if not text:
+        # Nothing to score: a row with score 0 would only skew the dashboard
+        raise ValueError("No text could be extracted from the resume")
+
+    with timer.stage('vectorize'):
+        result, resume_counts, signature = score_resume(model, text, jd_text, jd)
+    truncated = extract_stats.get('truncated')
+    if truncated:
+        # 'pages', 'size' or 'time': the limit that cut extraction short
+        result['truncated'] = truncated
+    progress(80)
+
+    def write(conn):
+        file_id, added = save_resume(conn, model, user_id, filename, text, jd_text, result, resume_counts, signature)
+        # A score from text cut short by a busy pool is not kept; a retry may read the whole file
+        if truncated != 'time':
+            store_result(conn, user_id, resume_hash, jd_hash, file_id, result)
+        return added
+
+    with timer.stage('db_write'):
+        added = run_in_transaction(write)
+        if added is not None:
+            model.apply_added([added])
+    run_in_transaction(timer.save)
+    progress(100)
+    return result
@@ -1,378 +1,88 @@
 import streamlit as st
 import sqlite3
 import os
+import html
 import json
 from datetime import datetime
-import tempfile
-from PyPDF2 import PdfReader
-import docx2txt
-from sklearn.feature_extraction.text import TfidfVectorizer
-import pandas as pd
-import io
 import re
+import tempfile
+import time
+import zipfile
+from db import (RESUME_SORTS, SNIPPET_END, SNIPPET_START, cluster_info, delete_jd, fetch_resume_page, get_db_connection,
+                get_resume_stats, init_db, list_jds, run_in_transaction, search_resumes)
+from export import EXPORT_FORMATS, write_export
+from job_queue import get_job, submit_analysis
+from metrics import render_text as render_metrics_text, summarize as summarize_metrics
 
 # Set page config at the very top
 st.set_page_config(layout="wide")
 
-# Database setup
-DATABASE = 'app.db'
+RESUMES_PAGE_SIZE = 25
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024  # exports larger than this spill to disk while being written
+STATS_TTL = 60  # seconds; bounds staleness from writes made by other processes
+METRICS_WINDOWS = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400, "All time": None}
+TRUNCATION_REASONS = {"pages": "page limit", "size": "size limit", "time": "time limit"}
+
+
+# Initialize database once per process (tables are created only if missing)
+@st.cache_resource
+def setup_database():
+    init_db()
+
+
+setup_database()
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
 
-def init_db():
+@st.cache_data(ttl=STATS_TTL)
+def dashboard_stats():
     conn = get_db_connection()
-    conn.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        user_type TEXT NOT NULL
-    )''')
-    conn.execute('''CREATE TABLE IF NOT EXISTS files (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        filename TEXT NOT NULL,
-        file_type TEXT NOT NULL,
-        analysis_score REAL,
-        metadata TEXT,
-        upload_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )''')
-    conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        job_title TEXT NOT NULL,
-        description TEXT NOT NULL,
-        upload_date DATETIME DEFAULT CURRENT_TIMESTAMP
-    )''')
-    conn.commit()
+    stats = get_resume_stats(conn)
     conn.close()
+    return stats
+
+
+@st.cache_data(ttl=STATS_TTL)
+def resume_history(user_id):
+    conn = get_db_connection()
+    resumes = conn.execute("SELECT id, filename, upload_date, analysis_score FROM files WHERE user_id = ? AND file_type = 'resume'", (user_id,)).fetchall()
+    conn.close()
+    return [dict(resume) for resume in resumes]
+
+
+def clear_file_caches():
+    # Call after every insert into files
+    dashboard_stats.clear()
+    resume_history.clear()
+
+
+@st.cache_data(ttl=STATS_TTL)
+def published_jds():
+    conn = get_db_connection()
+    jds = list_jds(conn)
+    conn.close()
+    return [dict(jd) for jd in jds]
+
+
+@st.cache_data(ttl=STATS_TTL)
+def stage_summary(window):
+    # Keyed by the window's name, so every rerun in the TTL shares one read of stage_metrics
+    since = time.time() - METRICS_WINDOWS[window] if METRICS_WINDOWS[window] else 0.0
+    conn = get_db_connection()
+    summary = summarize_metrics(conn, since)
+    conn.close()
+    return summary
+
+# Custom CSS with enhanced color usage, read and minified once per process
+@st.cache_resource
+def load_css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'style.css')) as f:
+        css = f.read()
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return f'<style>{css}</style>'
 
-# Initialize database if it doesn't exist
-if not os.path.exists(DATABASE):
-    init_db()
 
-# Custom CSS with enhanced color usage
-st.markdown("""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-        * { font-family: 'Inter', sans-serif; }
-        :root {
-            --ice-cold: #a0d2eb;
-            --freeze-purple: #e5eaf5;
-            --medium-purple: #d0bdf4;
-            --purple-pain: #8458B3;
-            --heavy-purple: #a28089;
-        }
-        body {
-            background: linear-gradient(135deg, var(--ice-cold) 0%, var(--freeze-purple) 50%, var(--medium-purple) 100%);
-        }
-        .gradient-bg {
-            background: linear-gradient(135deg, var(--ice-cold) 0%, var(--medium-purple) 50%, var(--purple-pain) 100%);
-            border-radius: 12px;
-            padding: 1rem;
-        }
-        .card-hover {
-            transition: all 0.3s ease;
-            border: 3px solid var(--medium-purple);
-            background: var(--freeze-purple);
-        }
-        .card-hover:hover {
-            transform: translateY(-8px);
-            box-shadow: 0 20px 40px rgba(132, 88, 179, 0.3);
-            border-color: var(--purple-pain);
-            background: var(--ice-cold);
-        }
-        .fade-in {
-            animation: fadeIn 0.8s ease-in;
-        }
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(30px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        .slide-in-left {
-            animation: slideInLeft 0.8s ease-out;
-        }
-        @keyframes slideInLeft {
-            from { opacity: 0; transform: translateX(-50px); }
-            to { opacity: 1; transform: translateX(0); }
-        }
-        .slide-in-right {
-            animation: slideInRight 0.8s ease-out;
-        }
-        @keyframes slideInRight {
-            from { opacity: 0; transform: translateX(50px); }
-            to { opacity: 1; transform: translateX(0); }
-        }
-        .floating {
-            animation: floating 3s ease-in-out infinite;
-        }
-        @keyframes floating {
-            0%, 100% { transform: translateY(0); }
-            50% { transform: translateY(-10px); }
-        }
-        .progress-bar {
-            transition: width 2s ease-in-out;
-            background: linear-gradient(90deg, var(--ice-cold), var(--purple-pain));
-            border-radius: 8px;
-        }
-        .btn-primary {
-            background: linear-gradient(135deg, var(--purple-pain), var(--heavy-purple));
-            color: white;
-            transition: all 0.3s ease;
-            padding: 12px 24px;
-            border-radius: 10px;
-            border: none;
-            font-weight: 600;
-        }
-        .btn-primary:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 12px 30px rgba(132, 88, 179, 0.4);
-            background: linear-gradient(135deg, var(--heavy-purple), var(--purple-pain));
-        }
-        .btn-secondary {
-            background: var(--ice-cold);
-            color: var(--purple-pain);
-            border: 3px solid var(--purple-pain);
-            padding: 12px 24px;
-            border-radius: 10px;
-            transition: all 0.3s ease;
-            font-weight: 600;
-        }
-        .btn-secondary:hover {
-            background: var(--purple-pain);
-            color: white;
-            border-color: var(--ice-cold);
-            transform: translateY(-3px);
-        }
-        .skill-tag {
-            background: linear-gradient(45deg, var(--ice-cold), var(--medium-purple));
-            border: 2px solid var(--purple-pain);
-            padding: 6px 12px;
-            border-radius: 14px;
-            display: inline-block;
-            margin: 3px;
-            color: var(--heavy-purple);
-            font-weight: 500;
-            animation: slideIn 0.5s ease-out;
-        }
-        @keyframes slideIn {
-            from { opacity: 0; transform: translateX(-20px); }
-            to { opacity: 1; transform: translateX(0); }
-        }
-        .navbar {
-            background: linear-gradient(90deg, var(--freeze-purple), var(--ice-cold));
-            backdrop-filter: blur(12px);
-            border-bottom: 2px solid var(--medium-purple);
-            padding: 1.5rem;
-            position: sticky;
-            top: 0;
-            z-index: 100;
-            border-radius: 0 0 12px 12px;
-        }
-        .hero-section {
-            background: linear-gradient(135deg, var(--ice-cold) 0%, var(--medium-purple) 50%, var(--purple-pain) 100%);
-            min-height: 100vh;
-            padding: 4rem 2rem;
-            border-radius: 12px;
-        }
-        .feature-card {
-            background: var(--freeze-purple);
-            border: 3px solid var(--medium-purple);
-            border-radius: 18px;
-            padding: 2rem;
-            margin: 1rem 0;
-            transition: all 0.3s ease;
-        }
-        .feature-card:hover {
-            transform: translateY(-10px);
-            box-shadow: 0 25px 50px rgba(132, 88, 179, 0.3);
-            background: var(--ice-cold);
-            border-color: var(--purple-pain);
-        }
-        .score-circle {
-            width: 140px;
-            height: 140px;
-            border-radius: 50%;
-            background: conic-gradient(var(--purple-pain) 0deg, var(--ice-cold) 360deg);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            position: relative;
-            margin: 1.5rem auto;
-            border: 4px solid var(--medium-purple);
-        }
-        .score-inner {
-            width: 100px;
-            height: 100px;
-            background: var(--freeze-purple);
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 1.8rem;
-            color: var(--purple-pain);
-            border: 2px solid var(--heavy-purple);
-        }
-        .modal {
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.6);
-            z-index: 1000;
-        }
-        .modal.show {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .modal-content {
-            background: var(--freeze-purple);
-            border-radius: 18px;
-            padding: 2.5rem;
-            max-width: 550px;
-            width: 95%;
-            max-height: 90vh;
-            overflow-y: auto;
-            animation: modalSlideIn 0.3s ease-out;
-            border: 3px solid var(--medium-purple);
-        }
-        @keyframes modalSlideIn {
-            from { opacity: 0; transform: scale(0.8); }
-            to { opacity: 1; transform: scale(1); }
-        }
-        .tab-button {
-            padding: 14px 28px;
-            border: 3px solid var(--medium-purple);
-            background: var(--ice-cold);
-            color: var(--purple-pain);
-            transition: all 0.3s ease;
-            border-radius: 10px;
-            cursor: pointer;
-            font-weight: 600;
-        }
-        .tab-button.active {
-            background: var(--purple-pain);
-            color: white;
-            border-color: var(--ice-cold);
-        }
-        .dropdown {
-            position: relative;
-        }
-        .dropdown-content {
-            display: none;
-            position: absolute;
-            top: 100%;
-            right: 0;
-            background: var(--freeze-purple);
-            border: 3px solid var(--medium-purple);
-            border-radius: 10px;
-            box-shadow: 0 12px 30px rgba(0, 0, 0, 0.2);
-            z-index: 100;
-            min-width: 220px;
-        }
-        .dropdown.show .dropdown-content {
-            display: block;
-        }
-        .table-row:nth-child(even) {
-            background: var(--ice-cold);
-        }
-        .table-row:nth-child(odd) {
-            background: var(--freeze-purple);
-        }
-        .table-row:hover {
-            background: var(--medium-purple);
-            color: var(--purple-pain);
-            transition: all 0.3s ease;
-        }
-        .status-high {
-            background: linear-gradient(45deg, var(--ice-cold), var(--purple-pain));
-            color: white;
-            padding: 4px 10px;
-            border-radius: 6px;
-            font-weight: 500;
-        }
-        .status-medium {
-            background: linear-gradient(45deg, var(--medium-purple), var(--heavy-purple));
-            color: white;
-            padding: 4px 10px;
-            border-radius: 6px;
-            font-weight: 500;
-        }
-        .status-low {
-            background: linear-gradient(45deg, var(--heavy-purple), var(--purple-pain));
-            color: white;
-            padding: 4px 10px;
-            border-radius: 6px;
-            font-weight: 500;
-        }
-        .hero-section {
-            position: relative;
-            min-height: 100vh;
-            padding: 4rem 2rem;
-        }
-        .hero-content {
-            position: relative;
-            z-index: 1;
-            padding: 2rem;
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 12px;
-            backdrop-filter: blur(8px);
-        }
-        .button-group {
-            margin-top: 1.5rem;
-        }
-        .card-hover {
-            position: relative;
-            width: 100%;
-        }
-        .stButton>button {
-            width: 100%;
-            background: linear-gradient(135deg, var(--purple-pain), var(--heavy-purple));
-            color: white;
-            border-radius: 10px;
-            padding: 12px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-        }
-        .stButton>button:hover {
-            background: linear-gradient(135deg, var(--heavy-purple), var(--purple-pain));
-            transform: translateY(-3px);
-            box-shadow: 0 12px 30px rgba(132, 88, 179, 0.4);
-        }
-        .stDataFrame table {
-            width: 100%;
-            border-collapse: collapse;
-            border: 2px solid var(--medium-purple);
-            background: var(--freeze-purple);
-        }
-        .stDataFrame th {
-            background: var(--purple-pain);
-            color: white;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-        }
-        .stDataFrame td {
-            padding: 12px;
-            border: 1px solid var(--medium-purple);
-            color: var(--heavy-purple);
-        }
-        .stDataFrame tr:nth-child(even) {
-            background: var(--ice-cold);
-        }
-        .stDataFrame tr:hover {
-            background: var(--medium-purple);
-            color: var(--purple-pain);
-        }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Sidebar for navigation with navbar style
 st.markdown('<div class="navbar flex justify-between items-center">', unsafe_allow_html=True)
@@ -384,7 +94,7 @@ if 'logged_in' not in st.session_state or not st.session_state.logged_in:
     pages = ["Home", "Features", "How It Works", "Login", "Sign Up"]
 else:
     if st.session_state.user_type == 'student':
-        pages = ["Dashboard", "Profile", "Logout"]
+        pages = ["Dashboard", "Best-Fit Jobs", "Profile", "Logout"]
     elif st.session_state.user_type == 'placement':
         pages = ["Placement Dashboard", "Logout"]
 
@@ -588,17 +298,13 @@ elif page == "Sign Up":
     user_type = st.selectbox("Sign Up As", ["Job Seeker", "Placement Team"])
     if st.button("Sign Up"):
         try:
-            conn = get_db_connection()
-            conn.execute(
+            run_in_transaction(lambda conn: conn.execute(
                 "INSERT INTO users (name, email, password, user_type) VALUES (?, ?, ?, ?)",
                 (name, email, password, 'student' if user_type == "Job Seeker" else 'placement')
-            )
-            conn.commit()
+            ))
             st.success("Signed up successfully! Please login.")
         except sqlite3.IntegrityError:
             st.error("Email already exists")
-        finally:
-            conn.close()
 
 # Dashboard Page (Student Dashboard)
 elif page == "Dashboard":
@@ -607,96 +313,61 @@ elif page == "Dashboard":
 
     # File Upload
     uploaded_file = st.file_uploader("Upload Resume", type=["pdf", "doc", "docx"])
-    job_desc_file = st.file_uploader("Job Description", type=["pdf", "doc", "docx", "txt"])
-    job_desc_text = st.text_area("Or paste job description manually", height=200)
+    jds = {jd['id']: jd['job_title'] for jd in published_jds()}
+    jd_id = st.selectbox("Job Description", [None, *jds], format_func=lambda i: "My own job description" if i is None else jds[i], key="analysis_jd_id")
+    job_desc_file = None
+    job_desc_text = ""
+    if jd_id is None:
+        job_desc_file = st.file_uploader("Upload job description", type=["pdf", "doc", "docx", "txt"])
+        job_desc_text = st.text_area("Or paste job description manually", height=200)
 
     if st.button("Analyze Resume"):
-        if uploaded_file is not None:
-            progress = st.progress(0)
-            st.markdown('<p style="color: var(--purple-pain);">Initializing analysis...</p>', unsafe_allow_html=True)
-            progress.progress(20)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-
-            try:
-                def extract_text(filepath):
-                    if filepath.endswith('.pdf'):
-                        reader = PdfReader(filepath)
-                        text = " ".join([page.extract_text() or "" for page in reader.pages])
-                    else:
-                        text = docx2txt.process(filepath)
-                    return text.strip() if text else ""
-
-                text = extract_text(tmp_path)
-                progress.progress(40)
-                jd_text = job_desc_text or "Sample job description"
-                if job_desc_file:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(job_desc_file.name)[1]) as tmp_jd:
-                        tmp_jd.write(job_desc_file.getvalue())
-                        jd_text = extract_text(tmp_jd.name)
-                progress.progress(60)
-
-                score = 0.0
-                matched_skills_list = []
-                missing_skills = []
-                experience = "Not specified"
-                keywords = 0
-                if text and jd_text:
-                    vectorizer = TfidfVectorizer(stop_words='english')
-                    X = vectorizer.fit_transform([text, jd_text])
-                    from sklearn.metrics.pairwise import cosine_similarity
-                    cosine_sim = cosine_similarity(X[0:1], X[1:2])[0][0]
-                    score = max(0.0, cosine_sim) * 100
-
-                    features = vectorizer.get_feature_names_out()
-                    resume_tfidf = X[0].toarray()[0]
-                    jd_tfidf = X[1].toarray()[0]
-                    matched_skills_list = [features[i] for i in range(len(features)) if resume_tfidf[i] > 0 and jd_tfidf[i] > 0]
-                    missing_skills = [features[i] for i in range(len(features)) if resume_tfidf[i] == 0 and jd_tfidf[i] > 0]
-
-                    total_skills = len(matched_skills_list) + len(missing_skills)
-                    skills_matched = f"{len(matched_skills_list)}/{total_skills}" if total_skills > 0 else "0/0"
-                    keywords = (len(matched_skills_list) / total_skills * 100) if total_skills > 0 else 0
-
-                    # Extract experience
-                    experience_years = re.findall(r'(\d+)\s*(?:year|yr)s?', text.lower())
-                    if experience_years:
-                        total_exp = sum(int(y) for y in experience_years)
-                        experience = f"{total_exp} years"
-
-                progress.progress(80)
+        if uploaded_file is None:
+            st.error("Please upload a resume!")
+        elif jd_id is None and job_desc_file is None and not job_desc_text.strip():
+            st.error("Please choose or provide a job description!")
+        else:
+            st.session_state.analysis_job_id = submit_analysis(
+                st.session_state.user_id, uploaded_file.name, uploaded_file.getvalue(), job_desc_text,
+                job_desc_file.name if job_desc_file else None,
+                job_desc_file.getvalue() if job_desc_file else None,
+                jd_id=jd_id
+            )
 
-                conn = get_db_connection()
-                conn.execute(
-                    'INSERT INTO files (user_id, filename, file_type, analysis_score, metadata) VALUES (?, ?, ?, ?, ?)',
-                    (st.session_state.user_id, uploaded_file.name, 'resume', score, json.dumps({'text': text[:500], 'jd_text': jd_text[:500], 'matched_skills': matched_skills_list, 'missing_skills': missing_skills}))
-                )
-                conn.commit()
-                conn.close()
-                progress.progress(100)
-
-                os.unlink(tmp_path)
-                if job_desc_file:
-                    os.unlink(tmp_jd.name)
-
-                st.session_state.score = score
-                st.session_state.skills_matched = skills_matched
-                st.session_state.matched_skills_list = matched_skills_list
-                st.session_state.missing_skills = missing_skills
-                st.session_state.experience = experience
-                st.session_state.keywords = keywords
-                st.success("Analysis complete!")
-
-            except Exception as e:
-                st.error(f"Error: {e}")
-                if 'tmp_path' in locals():
-                    os.unlink(tmp_path)
-                if 'tmp_jd' in locals():
-                    os.unlink(tmp_jd.name)
+    # Poll the queued analysis without blocking the rest of the page
+    if 'analysis_job_id' in st.session_state:
+        @st.fragment(run_every=1)
+        def analysis_progress():
+            conn = get_db_connection()
+            job = get_job(conn, st.session_state.analysis_job_id, st.session_state.user_id)
+            conn.close()
+            if job is not None and job['status'] in ('queued', 'running'):
+                st.progress(job['progress'])
+                st.markdown('<p style="color: var(--purple-pain);">Analyzing resume...</p>', unsafe_allow_html=True)
+                return
+            del st.session_state.analysis_job_id
+            if job is not None and job['status'] == 'done':
+                clear_file_caches()
+                result = json.loads(job['result'])
+                truncated = result.pop('truncated', None)
+                for key, value in result.items():
+                    st.session_state[key] = value
+                message = "Analysis complete!"
+                if truncated:
+                    message += f" Only part of the file was read ({TRUNCATION_REASONS[truncated]}), so the score may be low."
+                st.session_state.analysis_message = ("success", message)
+            else:
+                st.session_state.analysis_message = ("error", f"Error: {job['error'] if job is not None else 'analysis not found'}")
+            st.rerun()
+
+        analysis_progress()
 
+    if 'analysis_message' in st.session_state:
+        kind, message = st.session_state.pop('analysis_message')
+        if kind == "success":
+            st.success(message)
         else:
-            st.error("Please upload a resume!")
+            st.error(message)
 
     # Display Results
     if "score" in st.session_state:
@@ -742,6 +413,32 @@ elif page == "Dashboard":
                         del st.session_state[key]
                 st.rerun()
 
+# Best-Fit Jobs Page (every published JD ranked against one of the student's resumes)
+elif page == "Best-Fit Jobs":
+    st.markdown('<h2 class="text-4xl font-bold mb-6 slide-in-left" style="color: var(--purple-pain);">Best-Fit Jobs</h2>', unsafe_allow_html=True)
+    st.markdown('<p style="color: var(--heavy-purple);">See which published job descriptions fit one of your analyzed resumes best</p>', unsafe_allow_html=True)
+
+    resumes = {r['id']: f"{r['filename']} ({r['upload_date']})" for r in reversed(resume_history(st.session_state.user_id))}
+    if resumes:
+        file_id = st.selectbox("Resume", list(resumes), format_func=resumes.get, key="fit_file_id")
+        fit_k = st.number_input("Jobs to show", min_value=1, max_value=100, value=10, step=1, key="fit_top_k")
+        if st.button("Find Best-Fit Jobs"):
+            import pandas as pd
+            from analysis import load_resume_counts
+            from jd_library import match_jobs
+            from scoring import get_model
+
+            conn = get_db_connection()
+            model = get_model(conn)
+            matches = match_jobs(conn, model, load_resume_counts(conn, model, file_id), int(fit_k))
+            conn.close()
+            if matches:
+                st.dataframe(pd.DataFrame([{'Job': m['job_title'], 'Fit': f"{m['score']:.0f}%"} for m in matches]), use_container_width=True, hide_index=True)
+            else:
+                st.markdown('<p style="color: var(--heavy-purple);">No job descriptions have been published yet.</p>', unsafe_allow_html=True)
+    else:
+        st.markdown('<p style="color: var(--heavy-purple);">Analyze a resume on the Dashboard first.</p>', unsafe_allow_html=True)
+
 # Profile Page
 elif page == "Profile":
     st.markdown('<h2 class="text-4xl font-bold mb-6 slide-in-left" style="color: var(--purple-pain);">Profile</h2>', unsafe_allow_html=True)
@@ -756,16 +453,11 @@ elif page == "Profile":
     email = st.text_input("Email", value=user['email'], disabled=True)
 
     if st.button("Update Profile"):
-        conn = get_db_connection()
-        conn.execute("UPDATE users SET name=? WHERE id=?", (name, st.session_state.user_id))
-        conn.commit()
-        conn.close()
+        run_in_transaction(lambda conn: conn.execute("UPDATE users SET name=? WHERE id=?", (name, st.session_state.user_id)))
         st.success("Profile updated!")
 
     st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Uploaded Resumes</h3>', unsafe_allow_html=True)
-    conn = get_db_connection()
-    resumes = conn.execute("SELECT filename, upload_date, analysis_score FROM files WHERE user_id = ? AND file_type = 'resume'", (st.session_state.user_id,)).fetchall()
-    conn.close()
+    resumes = resume_history(st.session_state.user_id)
     if resumes:
         for resume in resumes:
             st.markdown(f'<p class="skill-tag">{resume["filename"]} - Uploaded: {resume["upload_date"]} - Score: {resume["analysis_score"]:.0f}%</p>', unsafe_allow_html=True)
@@ -788,38 +480,74 @@ elif page == "Placement Dashboard":
     st.markdown('<p style="color: var(--heavy-purple);">Manage and analyze candidate resumes</p>', unsafe_allow_html=True)
 
     # Stats Display
-    conn = get_db_connection()
-    total_candidates = conn.execute("SELECT COUNT(*) FROM files WHERE file_type = 'resume'").fetchone()[0]
-    high_match = conn.execute("SELECT COUNT(*) FROM files WHERE analysis_score >= 80").fetchone()[0]
-    avg_score = conn.execute("SELECT AVG(analysis_score) FROM files WHERE file_type = 'resume'").fetchone()[0] or 0
-    conn.close()
+    stats = dashboard_stats()
+    total_candidates = stats['total']
+    high_match = stats['high']
+    avg_score = stats['avg']
 
     col1, col2, col3 = st.columns(3)
     col1.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{total_candidates}</div><div class="text-sm" style="color: var(--heavy-purple);">Total Candidates</div></div>', unsafe_allow_html=True)
     col2.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{high_match}</div><div class="text-sm" style="color: var(--heavy-purple);">High Match (80%+)</div></div>', unsafe_allow_html=True)
     col3.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{avg_score:.0f}%</div><div class="text-sm" style="color: var(--heavy-purple);">Avg. Match Score</div></div>', unsafe_allow_html=True)
 
-    tabs = st.tabs(["Resume Management", "Reports & Export"])
+    tabs = st.tabs(["Resume Management", "Job Descriptions", "Rank Candidates", "Bulk Upload", "Reports & Export", "Metrics"])
     with tabs[0]:
         st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Resume Management</h3>', unsafe_allow_html=True)
+        query = st.text_input("Search resume text", key="resumes_search", placeholder="e.g. python docker aws")
+        if query.strip():
+            conn = get_db_connection()
+            hits = search_resumes(conn, query, RESUMES_PAGE_SIZE)
+            conn.close()
+            if hits:
+                for hit in hits:
+                    snippet = html.escape(' '.join(hit['snippet'].split())).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+                    st.markdown(f'<div class="card-hover p-4 rounded-lg"><div class="font-bold" style="color: var(--purple-pain);">'
+                                f'{html.escape(hit["name"])} - {html.escape(hit["filename"])} - Score: {hit["analysis_score"]:.0f}%</div>'
+                                f'<div class="text-sm" style="color: var(--heavy-purple);">{snippet}</div></div>', unsafe_allow_html=True)
+            else:
+                st.markdown('<p style="color: var(--heavy-purple);">No resumes match your search.</p>', unsafe_allow_html=True)
+
         if st.button("View All Resumes"):
+            st.session_state.view_all_resumes = True
+        if st.session_state.get('view_all_resumes'):
+            col4, col5, col6 = st.columns(3)
+            sort = col4.selectbox("Sort by", list(RESUME_SORTS), key="resumes_sort")
+            min_score, max_score = col5.slider("Score range", 0, 100, (0, 100), key="resumes_score")
+            dates = col6.date_input("Uploaded between", value=(), key="resumes_dates")
+            date_from, date_to = dates if len(dates) == 2 else (None, None)
+            collapse = st.checkbox("Collapse near-duplicates (show each student's latest version)", value=True, key="resumes_collapse")
+
+            # Any filter change starts again from the first page
+            filters = (sort, min_score, max_score, date_from, date_to, collapse)
+            if st.session_state.get('resumes_filters') != filters:
+                st.session_state.resumes_filters = filters
+                st.session_state.resumes_cursors = [None]
+            cursors = st.session_state.resumes_cursors
+
+            import pandas as pd
+
             conn = get_db_connection()
-            resumes = conn.execute("""
-                SELECT f.filename, f.analysis_score, f.metadata, f.upload_date, u.name, u.email
-                FROM files f JOIN users u ON f.user_id = u.id WHERE f.file_type = 'resume'
-            """).fetchall()
+            resumes = fetch_resume_page(conn, sort, cursors[-1], RESUMES_PAGE_SIZE + 1, min_score, max_score, date_from, date_to, collapse)
+            has_next = len(resumes) > RESUMES_PAGE_SIZE
+            resumes = resumes[:RESUMES_PAGE_SIZE]
+            # Only the visible page's clusters are looked up
+            clusters = cluster_info(conn, [resume['cluster_id'] for resume in resumes])
             conn.close()
             if resumes:
                 data = []
                 for resume in resumes:
+                    # Only the visible page's metadata is ever decoded
                     metadata = json.loads(resume['metadata'])
                     text_sample = metadata['text'][:100] + "..."
+                    copies, owners = clusters.get(resume['cluster_id'], (1, 1))
                     data.append({
                         'Name': resume['name'],
                         'Email': resume['email'],
                         'Filename': resume['filename'],
                         'Score': f"{resume['analysis_score']:.0f}%",
                         'Upload Date': resume['upload_date'],
+                        'Versions': copies,
+                        'Flag': "Shared template" if owners > 1 else "",
                         'Text Sample': text_sample
                     })
                 df = pd.DataFrame(data)
@@ -827,40 +555,150 @@ elif page == "Placement Dashboard":
             else:
                 st.markdown('<p style="color: var(--heavy-purple);">No resumes uploaded yet.</p>', unsafe_allow_html=True)
 
+            prev_col, page_col, next_col = st.columns(3)
+            if prev_col.button("Previous", disabled=len(cursors) == 1, key="resumes_prev"):
+                cursors.pop()
+                st.rerun()
+            page_col.markdown(f'<p style="color: var(--heavy-purple); text-align: center;">Page {len(cursors)}</p>', unsafe_allow_html=True)
+            if next_col.button("Next", disabled=not has_next, key="resumes_next"):
+                cursors.append((resumes[-1]['sort_key'], resumes[-1]['id']))
+                st.rerun()
+
     with tabs[1]:
+        st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Publish a Job Description</h3>', unsafe_allow_html=True)
+        st.markdown('<p style="color: var(--heavy-purple);">Published job descriptions are listed on every student\'s Dashboard.</p>', unsafe_allow_html=True)
+        publish_title = st.text_input("Job title", key="publish_jd_title")
+        publish_file = st.file_uploader("Job description file", type=["pdf", "doc", "docx", "txt"], key="publish_jd_file")
+        publish_text = st.text_area("Or paste the job description", height=200, key="publish_jd_text")
+        if st.button("Publish"):
+            if not publish_title.strip():
+                st.error("Please give the job a title!")
+            elif publish_file is None and not publish_text.strip():
+                st.error("Please provide a job description!")
+            else:
+                from extraction import extract_text_cached
+                from jd_library import publish_jd
+                from scoring import get_model
+
+                conn = get_db_connection()
+                try:
+                    model = get_model(conn)
+                    text = extract_text_cached(conn, publish_file.getvalue(), publish_file.name) if publish_file else publish_text
+                except zipfile.BadZipFile:
+                    # Legacy .doc files, and anything else that is not really a DOCX
+                    text = None
+                    st.error("That file could not be read. Please upload a PDF, DOCX or TXT file.")
+                except ValueError as e:  # too large, or not parseable
+                    text = None
+                    st.error(f"Error: {e}")
+                finally:
+                    conn.close()
+                if text is not None and text.strip():
+                    run_in_transaction(publish_jd, model, publish_title.strip(), text, st.session_state.user_id)
+                    published_jds.clear()
+                    st.success(f"Published \"{publish_title.strip()}\".")
+                elif text is not None:
+                    st.error("No text could be extracted from that file.")
+
+        st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Published Job Descriptions</h3>', unsafe_allow_html=True)
+        jds = published_jds()
+        if jds:
+            import pandas as pd
+
+            st.dataframe(pd.DataFrame([{'Title': jd['job_title'], 'Published': jd['upload_date']} for jd in jds]), use_container_width=True, hide_index=True)
+            titles = {jd['id']: jd['job_title'] for jd in jds}
+            remove_id = st.selectbox("Job description", list(titles), format_func=titles.get, key="remove_jd_id")
+            if st.button("Remove"):
+                run_in_transaction(delete_jd, remove_id)
+                published_jds.clear()
+                st.rerun()
+        else:
+            st.markdown('<p style="color: var(--heavy-purple);">No job descriptions published yet.</p>', unsafe_allow_html=True)
+
+    with tabs[2]:
+        st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Rank Candidates for this JD</h3>', unsafe_allow_html=True)
+        rank_jd_text = st.text_area("Job description", height=200, key="rank_jd_text")
+        top_k = st.number_input("Shortlist size", min_value=1, max_value=500, value=20, step=1, key="rank_top_k")
+        rank_collapse = st.checkbox("Collapse near-duplicates (rank each student's latest version)", value=True, key="rank_collapse")
+        if st.button("Rank Candidates"):
+            if rank_jd_text.strip():
+                import pandas as pd
+                from scoring import get_model, rank_resumes
+
+                conn = get_db_connection()
+                model = get_model(conn)
+                ranked = rank_resumes(conn, model, rank_jd_text, int(top_k), rank_collapse)
+                conn.close()
+                if ranked:
+                    data = []
+                    for r in ranked:
+                        data.append({
+                            'Name': r['name'],
+                            'Email': r['email'],
+                            'Filename': r['filename'],
+                            'JD Match': f"{r['score']:.0f}%",
+                            'Upload Date': r['upload_date']
+                        })
+                    st.dataframe(pd.DataFrame(data), use_container_width=True)
+                else:
+                    st.markdown('<p style="color: var(--heavy-purple);">No resumes to rank yet.</p>', unsafe_allow_html=True)
+            else:
+                st.error("Please provide a job description!")
+
+    with tabs[3]:
+        st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Bulk Upload</h3>', unsafe_allow_html=True)
+        st.markdown('<p style="color: var(--heavy-purple);">Upload a ZIP of PDF, DOCX or TXT resumes to parse and score them all against one job description.</p>', unsafe_allow_html=True)
+        zip_file = st.file_uploader("Resumes (ZIP)", type=["zip"], key="bulk_zip")
+        bulk_jd_text = st.text_area("Job description", height=200, key="bulk_jd_text")
+        if st.button("Import Resumes"):
+            if zip_file is None:
+                st.error("Please upload a ZIP archive!")
+            elif not bulk_jd_text.strip():
+                st.error("Please provide a job description!")
+            else:
+                import pandas as pd
+                from bulk import ingest_zip
+
+                progress = st.progress(0)
+                status = st.empty()
+
+                def report(done, total):
+                    progress.progress(done / total if total else 1.0)
+                    status.markdown(f'<p style="color: var(--purple-pain);">{done}/{total} files processed</p>', unsafe_allow_html=True)
+
+                try:
+                    stored, errors = ingest_zip(zip_file.getvalue(), bulk_jd_text, st.session_state.user_id, report)
+                    if stored:
+                        clear_file_caches()
+                    progress.progress(1.0)
+                    st.success(f"Imported {stored} resumes.")
+                    if errors:
+                        st.markdown(f'<p style="color: var(--heavy-purple);">{len(errors)} files could not be imported:</p>', unsafe_allow_html=True)
+                        st.dataframe(pd.DataFrame(errors, columns=['File', 'Error']), use_container_width=True)
+                except zipfile.BadZipFile:
+                    st.error("That file is not a valid ZIP archive.")
+
+    with tabs[4]:
         st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Export All Students</h3>', unsafe_allow_html=True)
-        if st.button("Export All Students (CSV)"):
-            conn = get_db_connection()
-            students = conn.execute("""
-                SELECT u.name, u.email, f.filename, f.analysis_score, f.metadata, f.upload_date
-                FROM users u JOIN files f ON u.id = f.user_id
-                WHERE u.user_type = 'student' AND f.file_type = 'resume'
-            """).fetchall()
-            conn.close()
-            if students:
-                data = []
-                for s in students:
-                    metadata = json.loads(s['metadata'])
-                    data.append({
-                        'Name': s['name'],
-                        'Email': s['email'],
-                        'Filename': s['filename'],
-                        'Score': f"{s['analysis_score']:.0f}%",
-                        'Upload Date': s['upload_date'],
-                        'Matched Skills': ', '.join(metadata['matched_skills'][:20]),
-                        'Missing Skills': ', '.join(metadata['missing_skills'][:20]),
-                        'Text Sample': metadata['text'][:100] + "..."
-                    })
-                df = pd.DataFrame(data)
-                st.dataframe(df, use_container_width=True)  # Display the table before download
-                buffer = io.StringIO()
-                df.to_csv(buffer, index=False)
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+        export_collapse = st.checkbox("Only each student's latest version of near-duplicate resumes", value=True, key="export_collapse")
+        if st.button("Export All Students"):
+            file_name, mime = EXPORT_FORMATS[export_format]
+            # Rows go from the cursor to a spooled file chunk by chunk; the table is never built in memory
+            with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES) as buffer:
+                conn = get_db_connection()
+                exported = write_export(conn, buffer, export_format, export_collapse)
+                conn.close()
+                buffer.seek(0)
+                data = buffer.read()
+            if exported:
+                st.markdown(f'<p style="color: var(--heavy-purple);">{exported} students ready to download.</p>', unsafe_allow_html=True)
                 st.download_button(
-                    label="Download CSV",
-                    data=buffer.getvalue(),
-                    file_name="all_students.csv",
-                    mime="text/csv",
-                    key="download_csv"
+                    label=f"Download {export_format}",
+                    data=data,
+                    file_name=file_name,
+                    mime=mime,
+                    key="download_export"
                 )
             else:
                 st.markdown('<p style="color: var(--heavy-purple);">No students to export.</p>', unsafe_allow_html=True)
@@ -869,5 +707,28 @@ elif page == "Placement Dashboard":
         col7, col8, col9, col10 = st.columns(4)
         col7.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{total_candidates}</div><div class="text-sm" style="color: var(--heavy-purple);">Total Applications</div></div>', unsafe_allow_html=True)
         col8.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{high_match}</div><div class="text-sm" style="color: var(--heavy-purple);">High Match (80%+)</div></div>', unsafe_allow_html=True)
-        col9.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{total_candidates - high_match}</div><div class="text-sm" style="color: var(--heavy-purple);">Medium Match (60-79%)</div></div>', unsafe_allow_html=True)
-        col10.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{total_candidates - high_match}</div><div class="text-sm" style="color: var(--heavy-purple);">Low Match</div></div>', unsafe_allow_html=True)
\ No newline at end of file
+        col9.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{stats["medium"]}</div><div class="text-sm" style="color: var(--heavy-purple);">Medium Match (60-79%)</div></div>', unsafe_allow_html=True)
+        col10.markdown(f'<div class="card-hover text-center p-4 rounded-lg"><div class="text-xl font-bold" style="color: var(--purple-pain);">{stats["low"]}</div><div class="text-sm" style="color: var(--heavy-purple);">Low Match</div></div>', unsafe_allow_html=True)
+
+    with tabs[5]:
+        st.markdown('<h3 class="text-xl font-bold mb-4 slide-in-right" style="color: var(--purple-pain);">Analysis Latency</h3>', unsafe_allow_html=True)
+        window = st.selectbox("Window", list(METRICS_WINDOWS), key="metrics_window")
+        summary = stage_summary(window)
+        if summary:
+            import pandas as pd
+
+            df = pd.DataFrame([{
+                'Stage': s['stage'],
+                'Samples': s['count'],
+                'p50 (ms)': round(s['p50_ms'], 1),
+                'p95 (ms)': round(s['p95_ms'], 1),
+                'Mean (ms)': round(s['mean_ms'], 1),
+                'Per Minute': round(s['per_min'], 2)
+            } for s in summary])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            metrics_text = render_metrics_text(summary)
+            st.code(metrics_text, language="text")
+            st.download_button("Download Metrics", metrics_text, file_name="metrics.txt", mime="text/plain")
+        else:
+            st.markdown('<p style="color: var(--heavy-purple);">No analyses recorded in this window.</p>', unsafe_allow_html=True)
+
@@ -0,0 +1,211 @@
+"""Per-stage timings for the analysis pipeline and the Placement Dashboard queries.
+
+Runs against a throwaway database grown to each requested size in turn, and writes
+machine-readable results that can be diffed between commits:
+
+    python -m benchmarks.bench --sizes 1000 10000 100000 --out before.json
+    python -m benchmarks.bench --compare before.json after.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import corpus
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean_ms': statistics.fmean(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min_ms': ordered[0],
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def timed_each(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def populate(conn, model, start, stop, user_id, rng, batch=5000):
+    """Grow files/resume_text to `stop` rows with untimed batched inserts."""
+    from document import analyze
+    from scoring import pack_counts
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for lo in range(start, stop, batch):
+        files = []
+        texts = []
+        for i in range(lo, min(lo + batch, stop)):
+            text = corpus.resume_text(rng, words=80)
+            score = rng.uniform(0, 100)
+            metadata = json.dumps({'text': text[:500], 'jd_text': '', 'matched_skills': rng.sample(corpus.SKILLS, 5),
+                                   'missing_skills': rng.sample(corpus.SKILLS, 5)})
+            uploaded = (base + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+            files.append((i + 1, user_id, f"resume_{i:06d}.pdf", 'resume', score, metadata, uploaded))
+            texts.append((i + 1, text, *pack_counts(model.count_doc(analyze(text))[0])))
+        conn.executemany('INSERT INTO files (id, user_id, filename, file_type, analysis_score, metadata, upload_date) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)', files)
+        conn.executemany('INSERT INTO resume_text (file_id, text, cols, counts) VALUES (?, ?, ?, ?)', texts)
+        conn.commit()
+
+
+def run(sizes, docs, inserts, seed):
+    import db
+
+    workdir = tempfile.mkdtemp(prefix='resume-bench-')
+    db.DATABASE = os.path.join(workdir, 'bench.db')
+    db.init_db()
+
+    from analysis import save_resume, score_resume
+    from export import write_csv
+    from extraction import extract_text
+    from scoring import get_model, rank_resumes, skill_diff
+    from skills import get_matcher
+
+    results = []
+
+    def record(stage, rows, summary):
+        results.append({'stage': stage, 'rows': rows, **summary})
+        print(f"{stage:<24} {rows if rows is not None else '-':>8}  "
+              f"p50 {summary['p50_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms  (n={summary['n']})", file=sys.stderr)
+
+    rng = random.Random(seed)
+    jd_texts = [corpus.jd_text(rng) for _ in range(10)]
+
+    # Size-independent pipeline stages
+    for fmt in corpus.FORMATS:
+        documents = [(name, data) for name, data, _ in corpus.generate(docs, seed, formats=(fmt,))]
+        record(f'extract_text.{fmt}', None, timed_each(lambda d: extract_text(d[1], d[0]), documents))
+
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO users (id, name, email, password, user_type) VALUES (1, 'Bench', 'bench@example.com', 'x', 'student')")
+    conn.commit()
+    model = get_model(conn)
+    texts = [text for _, _, text in corpus.generate(docs, seed, formats=('txt',))]
+    pairs = [(text, jd_texts[i % len(jd_texts)]) for i, text in enumerate(texts)]
+    record('score', None, timed_each(lambda p: score_resume(model, p[0], p[1]), pairs))
+    vectors = [(model.vectorize(text)[0], *model.vectorize(jd)) for text, jd in pairs]
+    record('skill_diff', None, timed_each(lambda v: skill_diff(*v), vectors))
+    matcher = get_matcher()
+    record('skill_scan', None, timed_each(matcher.find, texts))
+
+    # Stages whose cost depends on how many resumes are stored
+    stored = 0
+    for size in sorted(sizes):
+        populate(conn, model, stored, size, 1, rng)
+        stored = size
+
+        scored = [score_resume(model, text, jd) for text, jd in pairs[:inserts]]
+        rows = [(f"bench_{i}.pdf", pairs[i % len(pairs)][0], pairs[i % len(pairs)][1], *scored[i % len(scored)])
+                for i in range(inserts)]
+        record('insert', size, timed_each(lambda r: model.apply_added([db.run_in_transaction(save_resume, model, 1, *r)[1]]), rows))
+        stored += inserts
+
+        record('stats.rollup', size, timed(lambda: db.get_resume_stats(conn), 50))
+        record('stats.scan', size, timed(lambda: (
+            conn.execute("SELECT COUNT(*) FROM files WHERE file_type = 'resume'").fetchone(),
+            conn.execute("SELECT COUNT(*) FROM files WHERE analysis_score >= 80").fetchone(),
+            conn.execute("SELECT AVG(analysis_score) FROM files WHERE file_type = 'resume'").fetchone(),
+        ), 10))
+
+        record('page.first', size, timed(lambda: db.fetch_resume_page(conn, 'Newest first'), 50))
+        middle = conn.execute("SELECT upload_date, id FROM files WHERE file_type = 'resume' "
+                              "ORDER BY upload_date DESC, id DESC LIMIT 1 OFFSET ?", (stored // 2,)).fetchone()
+        record('page.middle', size, timed(lambda: db.fetch_resume_page(conn, 'Newest first', tuple(middle)), 50))
+        record('page.filtered', size, timed(lambda: db.fetch_resume_page(conn, 'Highest score', None, 25, 40, 60), 20))
+
+        record('rank', size, timed(lambda: rank_resumes(conn, model, jd_texts[0], 20), 5))
+        record('search', size, timed(lambda: db.search_resumes(conn, f"{corpus.SKILLS[0]} {corpus.SKILLS[1]}"), 20))
+
+        record('export.csv', size, timed(lambda: write_csv(conn, io.BytesIO()), 3 if size <= 10000 else 1))
+
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': seed,
+            'docs': docs,
+            'inserts': inserts,
+        },
+        'results': results,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {(r['stage'], r['rows']): r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = json.load(f)['results']
+    print(f"{'stage':<24} {'rows':>8} {'before p50':>12} {'after p50':>12} {'change':>8}")
+    for r in after:
+        old = before.get((r['stage'], r['rows']))
+        if old is None:
+            continue
+        change = (r['p50_ms'] / old['p50_ms'] - 1) * 100 if old['p50_ms'] else 0.0
+        rows = r['rows'] if r['rows'] is not None else '-'
+        print(f"{r['stage']:<24} {rows:>8} {old['p50_ms']:>10.2f}ms {r['p50_ms']:>10.2f}ms {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="stored-resume counts to measure the DB stages at")
+    parser.add_argument('--docs', type=int, default=30, help="documents per format for the pipeline stages")
+    parser.add_argument('--inserts', type=int, default=100, help="timed inserts at each size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write JSON results here instead of stdout")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args.sizes, args.docs, args.inserts, args.seed)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
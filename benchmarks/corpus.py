@@ -0,0 +1,132 @@
+"""Synthetic resume/JD corpus for the benchmarks.
+
+Everything is derived from a seeded RNG, so the same seed always gives the same corpus.
+
+    python -m benchmarks.corpus --out corpus/ --count 200
+"""
+import argparse
+import io
+import os
+import random
+import textwrap
+
+SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'sql', 'postgresql', 'mongodb', 'react', 'angular',
+    'django', 'flask', 'spring', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'terraform', 'linux',
+    'git', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn', 'spark', 'hadoop', 'kafka',
+    'redis', 'graphql', 'rest', 'microservices', 'agile', 'scrum', 'jenkins', 'excel', 'tableau',
+    'powerbi', 'c++', 'golang', 'rust', 'kotlin', 'swift', 'html', 'css', 'figma', 'selenium',
+]
+FILLER = [
+    'developed', 'designed', 'implemented', 'led', 'built', 'optimized', 'maintained', 'delivered',
+    'team', 'project', 'system', 'platform', 'service', 'pipeline', 'dashboard', 'application',
+    'customers', 'performance', 'scalable', 'reliable', 'internal', 'production', 'data', 'reports',
+    'stakeholders', 'requirements', 'testing', 'deployment', 'migration', 'automation', 'analysis',
+]
+SECTIONS = ['Summary', 'Experience', 'Projects', 'Skills', 'Education']
+
+
+def resume_text(rng, words=300):
+    skills = rng.sample(SKILLS, rng.randint(5, 15))
+    lines = [f"Candidate {rng.randint(1000, 9999)}"]
+    for section in SECTIONS:
+        lines.append(section)
+        if section == 'Skills':
+            lines.append(', '.join(skills))
+        elif section == 'Experience':
+            lines.append(f"{rng.randint(1, 12)} years of experience with {skills[0]} and {skills[1]}")
+        body = [rng.choice(skills) if rng.random() < 0.2 else rng.choice(FILLER)
+                for _ in range(words // len(SECTIONS))]
+        lines.append(' '.join(body) + '.')
+    return '\n'.join(lines)
+
+
+def jd_text(rng, words=150):
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    body = [rng.choice(skills) if rng.random() < 0.3 else rng.choice(FILLER) for _ in range(words)]
+    return (f"We are hiring an engineer with {rng.randint(1, 8)}+ years of experience in "
+            f"{', '.join(skills)}.\n" + ' '.join(body) + '.')
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def to_pdf(text, lines_per_page=45):
+    """Minimal multi-page PDF with the text laid out as Helvetica lines."""
+    lines = [wrapped for line in text.split('\n') for wrapped in (textwrap.wrap(line, 90) or [''])]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        ops = ["BT /F1 10 Tf 12 TL 50 750 Td"] + [f"({_pdf_escape(line)}) Tj T*" for line in page] + ["ET"]
+        stream = '\n'.join(ops).encode('latin-1', errors='replace')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def to_docx(text):
+    import docx
+
+    document = docx.Document()
+    for line in text.split('\n'):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def to_txt(text):
+    return text.encode('utf-8')
+
+
+FORMATS = {'pdf': to_pdf, 'docx': to_docx, 'txt': to_txt}
+
+
+def generate(count, seed=0, formats=tuple(FORMATS), words=300):
+    """Yield (filename, data, text) for `count` resumes, cycling through `formats`."""
+    rng = random.Random(seed)
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        text = resume_text(rng, words)
+        yield f"resume_{i:06d}.{fmt}", FORMATS[fmt](text), text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True, help="directory to write resumes and JDs into")
+    parser.add_argument('--count', type=int, default=100, help="number of resumes")
+    parser.add_argument('--jds', type=int, default=10, help="number of job descriptions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--words', type=int, default=300, help="approximate words per resume")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for filename, data, _ in generate(args.count, args.seed, words=args.words):
+        with open(os.path.join(args.out, filename), 'wb') as f:
+            f.write(data)
+    rng = random.Random(args.seed + 1)
+    for i in range(args.jds):
+        fmt = tuple(FORMATS)[i % len(FORMATS)]
+        with open(os.path.join(args.out, f"jd_{i:04d}.{fmt}"), 'wb') as f:
+            f.write(FORMATS[fmt](jd_text(rng)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import functools
+import io
+import os
+import re
+import zipfile
+import zlib
+
+from analysis import prepare_jd, save_resume, score_resume
+from db import get_db_connection, run_in_transaction
+from document import SECTION_HEADINGS
+from extraction import MAX_UPLOAD_BYTES, cached_text, content_hash, extract_many, store_text
+from scoring import get_model
+
+BULK_EXTENSIONS = ('.pdf', '.docx', '.txt')
+BULK_BATCH_SIZE = 50  # resumes written per transaction
+# What reading one archive member can raise: encrypted members (RuntimeError), corrupt
+# streams (zlib.error, EOFError), unsupported compression methods (NotImplementedError)
+READ_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError, OSError)
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_NAME_LINE = re.compile(r"[^\W\d_][\w.'-]*(?: [^\W\d_][\w.'-]*){1,3}")
+_NOT_NAMES = {'resume', 'cv', 'curriculum', 'vitae', 'final', 'updated', 'new', 'copy'}
+
+
+def _is_resume(member):
+    name = os.path.basename(member.filename)
+    return (not member.is_dir() and not name.startswith('.') and not member.filename.startswith('__MACOSX/')
+            and os.path.splitext(name)[1].lower() in BULK_EXTENSIONS)
+
+
+def _read_error(error):
+    # The exceptions' own messages name ZipInfo objects and zlib internals
+    if isinstance(error, NotImplementedError):  # a RuntimeError subclass, so checked first
+        return "unsupported compression method"
+    if isinstance(error, RuntimeError):
+        return "the file is encrypted"
+    if isinstance(error, (zipfile.BadZipFile, zlib.error, EOFError)):
+        return "the file is damaged in the archive"
+    return str(error)
+
+
+def candidate_identity(filename, text):
+    """(name, email) of the candidate a bulk-imported resume belongs to, read off the resume.
+
+    The name is the first line of text when that reads like a name, else the filename
+    without its noise words; the email is the first address in the text, or None.
+    """
+    first = next((' '.join(line.split()) for line in text.splitlines() if line.strip()), '')
+    words = first.lower().split()
+    if _NAME_LINE.fullmatch(first) and first.lower() not in SECTION_HEADINGS and not _NOT_NAMES.intersection(words):
+        name = first
+    else:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        name = ' '.join(w for w in re.split(r'[\W_]+', stem) if w and w.lower() not in _NOT_NAMES).title() or stem
+    email = EMAIL_PATTERN.search(text)
+    return name, email.group().lower() if email else None
+
+
+def ingest_zip(zip_data, jd_text, user_id, progress=None):
+    """Parse, score and store every resume in a ZIP archive; returns (stored, errors).
+
+    Members are read one at a time straight from the archive in memory and parsed on
+    the extraction workers; `errors` is a list of (filename, message).
+    `progress`, if given, is called with (files_done, files_total).
+    """
+    with zipfile.ZipFile(io.BytesIO(zip_data)) as archive:
+        members = [m for m in archive.infolist() if _is_resume(m)]
+        sources = [(os.path.basename(m.filename), m.file_size, functools.partial(archive.read, m)) for m in members]
+        return ingest(sources, jd_text, user_id, progress)
+
+
+def ingest(sources, jd_text, user_id, progress=None, jd=None, store=True, on_result=None, model=None):
+    """Parse, score and (if `store`) save many resumes against one JD; returns (stored, errors).
+
+    Without `store` nothing is written to the database, the text cache included.
+
+    Each resume is stored as its own candidate (see candidate_identity), with `user_id`,
+    the importing user, as its uploader. `sources` is a list of (filename, size, read) where read() returns the file's bytes;
+    files are read lazily, one at a time. `jd` may be a precomputed prepare_jd().
+    `on_result`, if given, is called with (filename, result) for every resume scored.
+    """
+    progress = progress or (lambda done, total: None)
+    on_result = on_result or (lambda filename, result: None)
+    errors = []
+    batch = []
+    stored = 0
+    done = 0
+    total = len(sources)
+
+    conn = get_db_connection()
+    try:
+        model = model or get_model(conn)
+        jd = jd or prepare_jd(model, jd_text)
+
+        def flush():
+            nonlocal stored
+            def write(conn):
+                added = []
+                for filename, text, *row in batch:
+                    _, cols = save_resume(conn, model, None, filename, text, *row, candidate=candidate_identity(filename, text),
+                                          uploaded_by=user_id)
+                    if cols is not None:
+                        added.append(cols)
+                return added
+            model.apply_added(run_in_transaction(write))
+            stored += len(batch)
+            batch.clear()
+
+        def add(filename, text):
+            nonlocal done
+            if text:
+                result, resume_counts, signature = score_resume(model, text, jd_text, jd)
+                on_result(filename, result)
+                if store:
+                    batch.append((filename, text, jd_text, result, resume_counts, signature))
+                    if len(batch) >= BULK_BATCH_SIZE:
+                        flush()
+            else:
+                errors.append((filename, "no text could be extracted"))
+            done += 1
+            progress(done, total)
+
+        def fail(filename, message):
+            nonlocal done
+            errors.append((filename, message))
+            done += 1
+            progress(done, total)
+
+        def uncached():
+            # Cache hits are scored right away; only misses go to the pool
+            for filename, size, read in sources:
+                if size > MAX_UPLOAD_BYTES:
+                    fail(filename, "file too large")
+                    continue
+                try:
+                    data = read()
+                except READ_ERRORS as e:
+                    fail(filename, _read_error(e))
+                    continue
+                digest = content_hash(data)
+                text = cached_text(conn, digest, touch=store)
+                if text is None:
+                    yield (filename, digest), data, filename
+                else:
+                    add(filename, text)
+
+        for (filename, digest), text, stats, error in extract_many(uncached()):
+            if error is not None:
+                fail(filename, error)
+            else:
+                if store and stats.get('truncated') != 'time':
+                    store_text(conn, digest, text)
+                add(filename, text)
+
+        if batch:
+            flush()
+    finally:
+        conn.close()
+    return stored, errors
@@ -0,0 +1,154 @@
+"""Score resume files against a job description without the web app.
+
+Files are parsed on a process pool and scored with the same corpus model, and
+(unless --dry-run) stored in the same database the app uses:
+
+    python cli.py resumes/ --jd job.pdf --user-id 3
+    python cli.py a.pdf b.docx --jd-text "Python developer" --dry-run --output scores.csv
+    python cli.py resumes/ --jd-id 2 --user-id 3 --workers 16
+"""
+import argparse
+import csv
+import functools
+import os
+import sys
+import zipfile
+
+import db
+import extraction
+
+CSV_COLUMNS = ['file', 'score', 'skills_matched', 'experience', 'matched_skills', 'missing_skills', 'error']
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def find_files(paths):
+    """Resume files named in `paths`, with directories searched recursively; (label, path) pairs."""
+    from bulk import BULK_EXTENSIONS
+
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                for name in sorted(files):
+                    if not name.startswith('.') and os.path.splitext(name)[1].lower() in BULK_EXTENSIONS:
+                        full = os.path.join(root, name)
+                        found.append((os.path.relpath(full, path), full))
+        else:
+            found.append((os.path.basename(path), path))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help="resume files or directories of them")
+    jd_group = parser.add_mutually_exclusive_group(required=True)
+    jd_group.add_argument('--jd', help="job description file (PDF, DOCX or TXT)")
+    jd_group.add_argument('--jd-text', help="job description text")
+    jd_group.add_argument('--jd-id', type=int, help="id of a job description published in the app")
+    parser.add_argument('--user-id', type=int, help="user recorded as importing the resumes (required unless --dry-run)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="score only; the database is read but never written, and must already exist")
+    parser.add_argument('--db', default=db.DATABASE, help="SQLite database (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="parser processes (default: %(default)s)")
+    parser.add_argument('--output', help="write per-file CSV results here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.user_id is None and not args.dry_run:
+        parser.error("--user-id is required unless --dry-run is given")
+    jd_data = None
+    if args.jd is not None:
+        # Before anything is set up, so a mistyped path leaves the database alone
+        try:
+            jd_data = _read(args.jd)
+        except OSError as e:
+            parser.error(f"cannot read {args.jd}: {e.strerror or e}")
+
+    # Both are read when first used, so they must be set before anything touches the DB or the workers
+    db.DATABASE = args.db
+    extraction.PDF_WORKERS = max(1, args.workers)
+    if args.dry_run:
+        # No schema setup or migrations either; the database must be one the app already uses
+        if not os.path.exists(args.db):
+            parser.error(f"{args.db} does not exist; a dry run never creates a database")
+    else:
+        db.init_db()
+
+    from analysis import prepare_jd
+    from bulk import ingest
+    from jd_library import load_jd
+    from scoring import CorpusModel, get_model
+
+    conn = db.get_db_connection()
+    try:
+        if args.dry_run:
+            model = CorpusModel()
+            model.load(conn, persist=False)
+        else:
+            if conn.execute('SELECT 1 FROM users WHERE id = ?', (args.user_id,)).fetchone() is None:
+                parser.error(f"no user with id {args.user_id}")
+            model = get_model(conn)
+        if args.jd_id is not None:
+            published = load_jd(conn, model, args.jd_id)
+            if published is None:
+                parser.error(f"no published job description with id {args.jd_id}")
+            jd_text, _, jd = published
+        elif args.jd is not None:
+            try:
+                if args.dry_run:
+                    jd_text = extraction.extract_text(jd_data, args.jd)
+                else:
+                    jd_text = extraction.extract_text_cached(conn, jd_data, args.jd)
+            except (ValueError, zipfile.BadZipFile) as e:
+                parser.error(f"cannot read {args.jd}: {e}")
+            jd = prepare_jd(model, jd_text)
+        else:
+            jd_text = args.jd_text
+            jd = prepare_jd(model, jd_text)
+    finally:
+        conn.close()
+    if not jd_text.strip():
+        parser.error("the job description is empty")
+
+    files = find_files(args.paths)
+    sources = []
+    for label, path in files:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0  # reported by the read below
+        sources.append((label, size, functools.partial(_read, path)))
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(CSV_COLUMNS)
+
+        def on_result(label, result):
+            writer.writerow([label, f"{result['score']:.1f}", result['skills_matched'], result['experience'],
+                             ', '.join(result['matched_skills_list']), ', '.join(result['missing_skills']), ''])
+
+        def progress(done, total):
+            print(f"\r{done}/{total} files", end='', file=sys.stderr, flush=True)
+
+        # A progress counter would garble results printed to the same terminal
+        show_progress = sys.stderr.isatty() and not (out is sys.stdout and sys.stdout.isatty())
+        stored, errors = ingest(sources, jd_text, args.user_id, progress if show_progress else None, jd=jd, store=not args.dry_run,
+                                on_result=on_result, model=model)
+        for label, message in errors:
+            writer.writerow([label, '', '', '', '', '', message])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if show_progress:
+        print(file=sys.stderr)
+    print(f"{len(files) - len(errors)} scored, {stored} stored, {len(errors)} failed", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import queue
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _drain_pool():
+    while True:
+        try:
+            sqlite3.Connection.close(db._idle.get_nowait())
+        except queue.Empty:
+            return
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """Connection to a fresh, initialised database in a temporary directory."""
+    _drain_pool()
+    monkeypatch.setattr(db, 'DATABASE', str(tmp_path / 'app.db'))
+    db.init_db()
+    connection = db.get_db_connection()
+    yield connection
+    connection.close()
+    _drain_pool()
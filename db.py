@@ -0,0 +1,411 @@
+import queue
+import re
+import sqlite3
+import time
+
+DATABASE = 'app.db'
+
+POOL_SIZE = 8  # idle connections kept per process
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05  # seconds, doubled after every busy retry
+STALE_JOB_SECONDS = 3600  # queued or running analyses untouched this long were lost to a restart
+
+_idle = queue.LifoQueue(maxsize=POOL_SIZE)
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the process pool."""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        try:
+            _idle.put_nowait(self)
+        except queue.Full:
+            sqlite3.Connection.close(self)
+
+
+def _connect():
+    # Connections move between Streamlit script threads, but only one uses a connection at a time
+    conn = sqlite3.connect(DATABASE, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                           cached_statements=256, factory=PooledConnection)
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers carry on while "Analyze Resume" writes
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -16000')
+    return conn
+
+
+def get_db_connection():
+    # Reusing connections also reuses their prepared-statement caches
+    try:
+        return _idle.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+
+def _is_busy(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def run_in_transaction(fn, *args):
+    """Run fn(conn, *args) in a write transaction and commit it, retrying while the DB is busy."""
+    for attempt in range(BUSY_RETRIES):
+        conn = get_db_connection()
+        try:
+            # Take the write lock up front so a busy DB fails here, before any work is done
+            conn.execute('BEGIN IMMEDIATE')
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            if attempt == BUSY_RETRIES - 1 or not _is_busy(e):
+                raise
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        time.sleep(BUSY_BACKOFF * 2 ** attempt)
+
+
+def init_db():
+    conn = get_db_connection()
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        user_type TEXT NOT NULL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        filename TEXT NOT NULL,
+        file_type TEXT NOT NULL,
+        analysis_score REAL,
+        metadata TEXT,
+        upload_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_type_score ON files (file_type, analysis_score)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_user ON files (user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_type_date ON files (file_type, upload_date)')
+    # Near-duplicate cluster (the id of its oldest member) and whether a newer version replaced it
+    _add_columns(conn, 'files', {'cluster_id': 'INTEGER', 'superseded': 'INTEGER NOT NULL DEFAULT 0'})
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_cluster ON files (cluster_id)')
+    # Bulk-imported resumes have no account behind them: user_id is NULL, the candidate is
+    # named here, and uploaded_by is the placement officer who imported them
+    _add_columns(conn, 'files', {
+        'candidate_name': 'TEXT',
+        'candidate_email': 'TEXT',
+        'uploaded_by': 'INTEGER REFERENCES users (id)',
+    })
+    # MinHash signatures and their LSH band buckets (see dedup.py)
+    signed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'resume_minhash'").fetchone()
+    conn.execute('''CREATE TABLE IF NOT EXISTS resume_minhash (
+        file_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL,
+        FOREIGN KEY (file_id) REFERENCES files (id)
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS resume_lsh (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        file_id INTEGER NOT NULL,
+        PRIMARY KEY (band, bucket, file_id)
+    ) WITHOUT ROWID''')
+    # Full extracted text lives outside files.metadata, which only keeps a 500-char sample
+    conn.execute('''CREATE TABLE IF NOT EXISTS resume_text (
+        file_id INTEGER PRIMARY KEY,
+        text TEXT NOT NULL,
+        FOREIGN KEY (file_id) REFERENCES files (id)
+    )''')
+    # Term counts of each resume, so it can be re-matched without re-analysis
+    _add_columns(conn, 'resume_text', {'cols': 'BLOB', 'counts': 'BLOB'})
+    # Full-text index over resume_text. External content: the index reads the text from
+    # resume_text instead of storing a second copy, and triggers keep the two in step
+    indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'resume_fts'").fetchone()
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS resume_fts USING fts5(
+        text, content='resume_text', content_rowid='file_id', tokenize='porter unicode61'
+    )''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_resume_fts_insert AFTER INSERT ON resume_text
+    BEGIN
+        INSERT INTO resume_fts (rowid, text) VALUES (NEW.file_id, NEW.text);
+    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_resume_fts_delete AFTER DELETE ON resume_text
+    BEGIN
+        INSERT INTO resume_fts (resume_fts, rowid, text) VALUES ('delete', OLD.file_id, OLD.text);
+    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_resume_fts_update AFTER UPDATE OF text ON resume_text
+    BEGIN
+        INSERT INTO resume_fts (resume_fts, rowid, text) VALUES ('delete', OLD.file_id, OLD.text);
+        INSERT INTO resume_fts (rowid, text) VALUES (NEW.file_id, NEW.text);
+    END''')
+    if indexed is None:
+        # First run against an existing DB: index the resumes stored so far
+        conn.execute("INSERT INTO resume_fts (resume_fts) VALUES ('rebuild')")
+    # Document frequencies for the corpus-wide TF-IDF model (see scoring.CorpusModel)
+    conn.execute('''CREATE TABLE IF NOT EXISTS corpus_df (
+        col INTEGER PRIMARY KEY,
+        df INTEGER NOT NULL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS corpus_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''')
+    # Full extracted text keyed by a hash of the uploaded bytes (see extraction.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS text_cache (
+        content_hash TEXT PRIMARY KEY,
+        text TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_used REAL NOT NULL
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_text_cache_last_used ON text_cache (last_used)')
+    # Finished analyses keyed by user, resume bytes and normalised JD (see analysis.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS score_cache (
+        user_id INTEGER NOT NULL,
+        resume_hash TEXT NOT NULL,
+        jd_hash TEXT NOT NULL,
+        file_id INTEGER NOT NULL,
+        result TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (user_id, resume_hash, jd_hash)
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_score_cache_last_used ON score_cache (last_used)')
+    # Background "Analyze Resume" runs, polled by the Dashboard (see job_queue.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS analysis_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        filename TEXT NOT NULL,
+        status TEXT NOT NULL,
+        progress INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''')
+    # Jobs run on threads of the process that queued them, so none survive a restart. Only old ones
+    # are failed here: other processes sharing the DB (the CLI, more servers) may have jobs in flight
+    conn.execute('''
+        UPDATE analysis_jobs SET status = 'failed', error = 'interrupted by a restart', updated_at = CURRENT_TIMESTAMP
+        WHERE status IN ('queued', 'running') AND updated_at < datetime('now', ?)
+    ''', (f'-{STALE_JOB_SECONDS} seconds',))
+    # Per-stage timings of each analysis (see metrics.py)
+    conn.execute('''CREATE TABLE IF NOT EXISTS stage_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stage TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        file_size INTEGER,
+        page_count INTEGER,
+        created_at REAL NOT NULL
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stage_metrics_created ON stage_metrics (created_at)')
+    conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        upload_date DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    # Published JDs carry their scoring inputs precomputed (see jd_library.py)
+    _add_columns(conn, 'jobs', {
+        'posted_by': 'INTEGER REFERENCES users (id)',
+        'text_hash': 'TEXT',
+        'cols': 'BLOB',
+        'counts': 'BLOB',
+        'terms': 'TEXT',
+        'skills': 'TEXT',
+        'skills_version': 'TEXT',  # SkillMatcher.version that found `skills`
+    })
+    if signed is None and conn.execute("SELECT 1 FROM files WHERE file_type = 'resume' LIMIT 1").fetchone():
+        # First run against a DB from before near-duplicate detection: sign and cluster the
+        # resumes stored so far. Imported only here, so a normal start never loads numpy
+        from dedup import backfill
+        backfill(conn)
+    conn.commit()
+    init_resume_stats(conn)
+    conn.close()
+
+
+def _add_columns(conn, table, columns):
+    # Tables created by older versions get any columns added since
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+
+
+def owner_key(table=None):
+    """SQL for who a resume belongs to: its account, else its bulk-imported candidate's email, else no one else."""
+    p = f'{table}.' if table else ''
+    return f"COALESCE('u' || {p}user_id, 'e' || {p}candidate_email, 'f' || {p}id)"
+
+
+def init_resume_stats(conn):
+    # Header-card rollup for the Placement Dashboard, kept current by triggers on files so it
+    # changes in the same transaction as every resume insert or delete
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('''CREATE TABLE IF NOT EXISTS resume_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL,
+        high INTEGER NOT NULL,
+        medium INTEGER NOT NULL,
+        low INTEGER NOT NULL,
+        score_sum REAL NOT NULL
+    )''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_resume_stats_insert
+        AFTER INSERT ON files WHEN NEW.file_type = 'resume'
+    BEGIN
+        UPDATE resume_stats SET
+            total = total + 1,
+            high = high + (NEW.analysis_score >= 80),
+            medium = medium + (NEW.analysis_score >= 60 AND NEW.analysis_score < 80),
+            low = low + (COALESCE(NEW.analysis_score, 0) < 60),
+            score_sum = score_sum + COALESCE(NEW.analysis_score, 0)
+        WHERE id = 1;
+    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_resume_stats_delete
+        AFTER DELETE ON files WHEN OLD.file_type = 'resume'
+    BEGIN
+        UPDATE resume_stats SET
+            total = total - 1,
+            high = high - (OLD.analysis_score >= 80),
+            medium = medium - (OLD.analysis_score >= 60 AND OLD.analysis_score < 80),
+            low = low - (COALESCE(OLD.analysis_score, 0) < 60),
+            score_sum = score_sum - COALESCE(OLD.analysis_score, 0)
+        WHERE id = 1;
+    END''')
+    if conn.execute('SELECT 1 FROM resume_stats WHERE id = 1').fetchone() is None:
+        # First run against an existing DB: one full scan to seed the rollup
+        conn.execute('''INSERT INTO resume_stats (id, total, high, medium, low, score_sum)
+            SELECT 1, COUNT(*),
+                COALESCE(SUM(analysis_score >= 80), 0),
+                COALESCE(SUM(analysis_score >= 60 AND analysis_score < 80), 0),
+                COALESCE(SUM(COALESCE(analysis_score, 0) < 60), 0),
+                COALESCE(SUM(analysis_score), 0)
+            FROM files WHERE file_type = 'resume'
+        ''')
+    conn.commit()
+
+
+def get_resume_stats(conn):
+    row = conn.execute('SELECT total, high, medium, low, score_sum FROM resume_stats WHERE id = 1').fetchone()
+    return {
+        'total': row['total'],
+        'high': row['high'],
+        'medium': row['medium'],
+        'low': row['low'],
+        'avg': row['score_sum'] / row['total'] if row['total'] else 0
+    }
+
+
+def cluster_info(conn, cluster_ids):
+    """{cluster_id: (resumes, distinct owners)} for the given clusters."""
+    ids = sorted({c for c in cluster_ids if c is not None})
+    if not ids:
+        return {}
+    rows = conn.execute(f'''
+        SELECT cluster_id, COUNT(*), COUNT(DISTINCT {owner_key()}) FROM files
+        WHERE cluster_id IN ({", ".join("?" * len(ids))})
+        GROUP BY cluster_id
+    ''', ids).fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def list_jds(conn):
+    """Published JDs, newest first, without their text or vectors."""
+    return conn.execute('SELECT id, job_title, upload_date FROM jobs ORDER BY upload_date DESC, id DESC').fetchall()
+
+
+def delete_jd(conn, job_id):
+    conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+
+# Name and email of the student behind a resume, for queries of files f LEFT JOIN users u
+CANDIDATE_COLUMNS = "COALESCE(u.name, f.candidate_name) AS name, COALESCE(u.email, f.candidate_email, '') AS email"
+
+# "View All Resumes" sort options: (column, direction); ties are broken by files.id
+RESUME_SORTS = {
+    'Newest first': ('f.upload_date', 'DESC'),
+    'Oldest first': ('f.upload_date', 'ASC'),
+    'Highest score': ('f.analysis_score', 'DESC'),
+    'Lowest score': ('f.analysis_score', 'ASC'),
+}
+
+
+def fetch_resume_page(conn, sort, after=None, limit=25, min_score=0, max_score=100, date_from=None, date_to=None,
+                      collapse=False):
+    """One page of resumes, keyset-paginated: `after` is the (sort_key, id) of the previous page's last row.
+
+    With `collapse`, resumes superseded by a newer near-duplicate from the same user are left out.
+    """
+    column, direction = RESUME_SORTS[sort]
+    where = ["f.file_type = 'resume'"]
+    params = []
+    if collapse:
+        where.append('f.superseded = 0')
+    if min_score > 0 or max_score < 100:
+        # Only when it narrows anything: a no-op range still steers the planner onto the score index
+        where.append('f.analysis_score BETWEEN ? AND ?')
+        params.extend([min_score, max_score])
+    if date_from is not None:
+        where.append('f.upload_date >= ?')
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("f.upload_date < date(?, '+1 day')")
+        params.append(str(date_to))
+    if after is not None:
+        where.append(f"({column}, f.id) {'<' if direction == 'DESC' else '>'} (?, ?)")
+        params.extend(after)
+    params.append(limit)
+    return conn.execute(f"""
+        SELECT f.id, {column} AS sort_key, f.filename, f.analysis_score, f.metadata, f.upload_date, f.cluster_id,
+            {CANDIDATE_COLUMNS}
+        FROM files f LEFT JOIN users u ON f.user_id = u.id
+        WHERE {' AND '.join(where)}
+        ORDER BY {column} {direction}, f.id {direction}
+        LIMIT ?
+    """, params).fetchall()
+
+
+# Marks around matched terms in search_resumes() snippets; control characters, so they never occur in resume text
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def match_expression(query):
+    """FTS5 query matching every word of `query`, or None if it has none.
+
+    Each word is quoted, so input such as "c++" or "node.js" cannot be read as FTS5 syntax.
+    """
+    words = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{word}"' for word in words) or None
+
+
+def search_resumes(conn, query, limit=25, collapse=False):
+    """Resumes whose full text contains every word of `query`, best BM25 match first.
+
+    Each row has a 'snippet' of the text around the matches, with matched terms
+    between SNIPPET_START and SNIPPET_END. Resumes stored before resume_text
+    existed have no full text and are not found.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    where = ["resume_fts MATCH ?", "f.file_type = 'resume'"]
+    if collapse:
+        where.append('f.superseded = 0')
+    return conn.execute(f"""
+        SELECT f.id, f.filename, f.analysis_score, f.upload_date, f.cluster_id, {CANDIDATE_COLUMNS},
+            snippet(resume_fts, 0, ?, ?, ' ... ', 16) AS snippet
+        FROM resume_fts JOIN files f ON f.id = resume_fts.rowid LEFT JOIN users u ON f.user_id = u.id
+        WHERE {' AND '.join(where)}
+        ORDER BY resume_fts.rank
+        LIMIT ?
+    """, (SNIPPET_START, SNIPPET_END, expression, limit)).fetchall()
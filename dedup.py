@@ -0,0 +1,115 @@
+import hashlib
+import json
+
+import numpy as np
+from sklearn.utils import murmurhash3_32
+
+from db import owner_key
+from document import analyze
+
+# MinHash signatures over word shingles, indexed with LSH banding. 32 bands of 4
+# rows make pairs above ~0.4 Jaccard likely candidates; candidates are then
+# confirmed against DUP_THRESHOLD using their full signatures.
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+DUP_THRESHOLD = 0.6  # estimated Jaccard similarity at which two resumes count as near-duplicates
+
+# Fixed forever: stored signatures are only comparable if these never change
+_PRIME = 4294967311  # smallest prime above 2**32
+_rng = np.random.default_rng(20240901)
+_A = _rng.integers(1, 2 ** 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 31, NUM_PERM, dtype=np.uint64)
+
+
+def minhash(doc):
+    """MinHash signature of an analysed document's word shingles, or None if it is too short."""
+    tokens = doc.tokens
+    if len(tokens) < SHINGLE_SIZE:
+        return None
+    shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    x = np.fromiter((murmurhash3_32(s, positive=True) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # a * x + b stays below 2**64 because a < 2**31 and x < 2**32
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def _buckets(signature):
+    # One bucket key per band; 7 bytes keeps it a positive SQLite INTEGER
+    bands = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [(band, int.from_bytes(hashlib.blake2b(rows.tobytes(), digest_size=7).digest(), 'big'))
+            for band, rows in enumerate(bands)]
+
+
+def index_resume(conn, file_id, signature):
+    """Add a new resume to the LSH index and its near-duplicate cluster; call inside run_in_transaction.
+
+    The resume joins the cluster of every indexed resume it nearly duplicates,
+    merging clusters if it bridges several. It supersedes the same owner's
+    earlier versions (see db.owner_key), so collapsed views only show their latest upload,
+    and is itself superseded if the owner already has a later one, as when backfilling.
+    """
+    buckets = _buckets(signature)
+    # One primary-key probe per band: the cost depends on bucket sizes, not on the corpus size
+    candidates = conn.execute(f'''
+        SELECT m.file_id, m.signature, f.cluster_id
+        FROM (
+            SELECT DISTINCT l.file_id
+            FROM (VALUES {', '.join(['(?, ?)'] * len(buckets))}) AS v
+            JOIN resume_lsh l ON l.band = v.column1 AND l.bucket = v.column2
+        ) hits
+        JOIN resume_minhash m ON m.file_id = hits.file_id
+        JOIN files f ON f.id = m.file_id
+    ''', [value for pair in buckets for value in pair]).fetchall()
+
+    clusters = {file_id}
+    for row in candidates:
+        if np.mean(np.frombuffer(row['signature'], dtype=np.uint64) == signature) >= DUP_THRESHOLD:
+            clusters.add(row['cluster_id'])
+    cluster_id = min(clusters)
+    merged = sorted(clusters - {cluster_id, file_id})
+    if merged:
+        conn.execute(f'UPDATE files SET cluster_id = ? WHERE cluster_id IN ({", ".join("?" * len(merged))})',
+                     (cluster_id, *merged))
+    conn.execute('UPDATE files SET cluster_id = ? WHERE id = ?', (cluster_id, file_id))
+    conn.execute(f'''
+        UPDATE files SET superseded = 1
+        WHERE cluster_id = ? AND id < ? AND {owner_key()} = (SELECT {owner_key()} FROM files WHERE id = ?)
+    ''', (cluster_id, file_id, file_id))
+    conn.execute(f'''
+        UPDATE files SET superseded = 1
+        WHERE id = ? AND EXISTS (
+            SELECT 1 FROM files g WHERE g.cluster_id = ? AND g.id > files.id AND {owner_key('g')} = {owner_key('files')}
+        )
+    ''', (file_id, cluster_id))
+
+    conn.execute('INSERT INTO resume_minhash (file_id, signature) VALUES (?, ?)',
+                 (file_id, signature.astype(np.uint64).tobytes()))
+    conn.executemany('INSERT OR IGNORE INTO resume_lsh (band, bucket, file_id) VALUES (?, ?, ?)',
+                     [(band, bucket, file_id) for band, bucket in buckets])
+
+
+def backfill(conn, batch=500):
+    """Sign and cluster every resume that has no signature yet, oldest first; the caller commits.
+
+    Signatures come from the stored full text, or from the metadata sample for
+    resumes stored before resume_text existed. Resumes too short to sign are skipped.
+    """
+    ids = [row[0] for row in conn.execute('''
+        SELECT f.id FROM files f
+        WHERE f.file_type = 'resume' AND NOT EXISTS (SELECT 1 FROM resume_minhash m WHERE m.file_id = f.id)
+        ORDER BY f.id
+    ''')]
+    # Texts are read a batch at a time, so a large corpus is never all in memory
+    for i in range(0, len(ids), batch):
+        chunk = ids[i:i + batch]
+        rows = conn.execute(f'''
+            SELECT f.id, t.text AS full_text, f.metadata
+            FROM files f LEFT JOIN resume_text t ON t.file_id = f.id
+            WHERE f.id IN ({", ".join("?" * len(chunk))})
+            ORDER BY f.id
+        ''', chunk).fetchall()
+        for row in rows:
+            signature = minhash(analyze(row['full_text'] or json.loads(row['metadata'])['text']))
+            if signature is not None:
+                index_resume(conn, row['id'], signature)
@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Same tokens and stop words as TfidfVectorizer's defaults, so vectors are unchanged
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+STOP_WORDS = ENGLISH_STOP_WORDS
+
+# Heading line (lowercased, trailing colon dropped) -> section name
+SECTION_HEADINGS = {
+    'summary': 'summary', 'profile': 'summary', 'objective': 'summary', 'career objective': 'summary',
+    'professional summary': 'summary', 'about me': 'summary',
+    'experience': 'experience', 'work experience': 'experience', 'professional experience': 'experience',
+    'employment history': 'experience', 'internships': 'experience', 'internship': 'experience',
+    'education': 'education', 'academic background': 'education', 'qualifications': 'education',
+    'skills': 'skills', 'technical skills': 'skills', 'key skills': 'skills', 'core competencies': 'skills',
+    'projects': 'projects', 'academic projects': 'projects', 'personal projects': 'projects',
+    'certifications': 'certifications', 'certificates': 'certifications',
+    'achievements': 'achievements', 'awards': 'achievements',
+}
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace."""
+    return ' '.join((text or '').lower().split())
+
+
+class Document:
+    """One text analysed once: normalised text, tokens with offsets, and sections.
+
+    Offsets index into `text`, the lowercased, whitespace-collapsed form. Scoring,
+    skill matching and the other extractors all read from here instead of
+    re-processing the raw text.
+    """
+
+    def __init__(self, raw):
+        lines = []
+        sections = {}
+        current = None
+        pos = 0
+        for line in (raw or '').lower().splitlines():
+            line = ' '.join(line.split())
+            if not line:
+                continue
+            name = SECTION_HEADINGS.get(line.rstrip(':').rstrip())
+            if name:
+                if current:
+                    sections[current[0]] = (current[1], pos)
+                current = (name, pos) if name not in sections else None
+            lines.append(line)
+            pos += len(line) + 1
+        self.text = ' '.join(lines)
+        if current:
+            sections[current[0]] = (current[1], len(self.text))
+        self.sections = sections
+
+        self.tokens = TOKEN_PATTERN.findall(self.text)
+        self._offsets = None
+        self._counts = None
+
+    @property
+    def offsets(self):
+        """Start offset of each token in `text`; only computed if an extractor asks for it."""
+        if self._offsets is None:
+            self._offsets = [m.start() for m in TOKEN_PATTERN.finditer(self.text)]
+        return self._offsets
+
+    @property
+    def counts(self):
+        """Term counts with stop words removed, as the TF-IDF model sees them."""
+        if self._counts is None:
+            self._counts = Counter(t for t in self.tokens if t not in STOP_WORDS)
+        return self._counts
+
+    def section(self, name):
+        """Text of a section, heading included, or '' if the document has none."""
+        span = self.sections.get(name)
+        return self.text[span[0]:span[1]].strip() if span else ''
+
+
+def analyze(text):
+    return Document(text)
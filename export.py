@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from db import CANDIDATE_COLUMNS, owner_key
+
+EXPORT_COLUMNS = ['Name', 'Email', 'Filename', 'Score', 'Upload Date', 'Matched Skills', 'Missing Skills', 'Text Sample', 'Flag']
+EXPORT_CHUNK_ROWS = 1000  # rows held in memory at once
+
+EXPORT_FORMATS = {
+    'CSV': ('all_students.csv', 'text/csv'),
+    'Parquet': ('all_students.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def export_chunks(conn, collapse=False):
+    """Yield the student export in EXPORT_CHUNK_ROWS-sized lists of rows, straight off the cursor.
+
+    Students are account holders and bulk-imported candidates alike. With `collapse`,
+    resumes superseded by a newer near-duplicate from the same student are left out.
+    """
+    # Near-duplicate clusters spanning several students are flagged as copied from a template
+    cur = conn.execute(f"""
+        SELECT {CANDIDATE_COLUMNS}, f.filename, f.analysis_score, f.metadata, f.upload_date, c.owners
+        FROM files f LEFT JOIN users u ON u.id = f.user_id
+        LEFT JOIN (
+            SELECT cluster_id, COUNT(DISTINCT {owner_key()}) AS owners FROM files
+            WHERE cluster_id IS NOT NULL GROUP BY cluster_id
+        ) c ON c.cluster_id = f.cluster_id
+        WHERE (u.user_type = 'student' OR f.user_id IS NULL) AND f.file_type = 'resume'{' AND f.superseded = 0' if collapse else ''}
+    """)
+    while True:
+        students = cur.fetchmany(EXPORT_CHUNK_ROWS)
+        if not students:
+            return
+        chunk = []
+        for s in students:
+            metadata = json.loads(s['metadata'])
+            chunk.append((
+                s['name'],
+                s['email'],
+                s['filename'],
+                s['analysis_score'],
+                s['upload_date'],
+                ', '.join(metadata['matched_skills'][:20]),
+                ', '.join(metadata['missing_skills'][:20]),
+                metadata['text'][:100] + "...",
+                "Shared template" if (s['owners'] or 0) > 1 else ""
+            ))
+        yield chunk
+
+
+def write_csv(conn, out, collapse=False):
+    """Stream the export as CSV into the binary file `out`; returns the row count."""
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+    rows = 0
+    for chunk in export_chunks(conn, collapse):
+        writer.writerows((*row[:3], f"{row[3]:.0f}%", *row[4:]) for row in chunk)
+        rows += len(chunk)
+    text.detach()
+    return rows
+
+
+def write_parquet(conn, out, collapse=False):
+    """Stream the export as Parquet into `out`, one row group per chunk; returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.float64() if name == 'Score' else pa.string()) for name in EXPORT_COLUMNS])
+    rows = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in export_chunks(conn, collapse):
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+def write_export(conn, out, fmt, collapse=False):
+    if fmt == 'Parquet':
+        return write_parquet(conn, out, collapse)
+    return write_csv(conn, out, collapse)
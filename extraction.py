@@ -0,0 +1,360 @@
+import atexit
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import unescape
+
+from docx2txt.docx2txt import xml2text
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
+
+# Upper bound on the extracted text kept in text_cache, in bytes of UTF-8
+TEXT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Parsing runs in worker processes, never in the app process, under these limits. Hitting
+# the page, XML or time limit keeps the text read so far; stats['truncated'] says which.
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024  # larger files are refused outright
+MAX_PDF_PAGES = 50  # pages past this are not read
+MAX_DOCX_XML_BYTES = 16 * 1024 * 1024  # decompressed XML read from a DOCX, so zip bombs stay bounded
+WORKER_MEMORY_BYTES = 1024 * 1024 * 1024  # address-space cap per worker, where the OS supports it
+DOC_TIMEOUT = 30  # seconds of parsing per document before it stops with what it has
+KILL_GRACE = 5  # further seconds before a worker stuck inside a single page is killed, alone
+
+# Extraction workers
+PDF_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+PARALLEL_MIN_PAGES = 6  # PDFs with fewer pages are parsed by a single worker
+
+_idle = []  # started workers waiting for a task
+_slots = None  # one per worker process allowed to run at a time; created on first use
+_dispatch = None  # threads that hand tasks to workers and wait on them
+_workers_lock = threading.Lock()
+_emit = None  # in a worker process: sends part of a result back before the task returns
+
+
+def _limit_worker(memory_bytes):
+    # An allocation past the cap fails with MemoryError in the worker
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_bytes = min(memory_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def _worker_main(conn, memory_bytes):
+    global _emit
+    _limit_worker(memory_bytes)
+    _emit = lambda part: conn.send(('part', part))
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = ('ok', fn(*args))
+        except Exception as e:
+            reply = ('error', e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # an exception that does not pickle
+            conn.send(('error', ValueError(str(e) or type(e).__name__)))
+
+
+class _Worker:
+    """One parser process with a private pipe, so a stuck task can be killed without touching any other."""
+
+    def __init__(self):
+        # spawn: forking the threaded Streamlit server is not safe
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, WORKER_MEMORY_BYTES), daemon=True)
+        self.process.start()
+        child.close()
+
+    def run(self, fn, args, timeout, parts):
+        # Returns (ok, result or exception), collecting _emit()ted parts into `parts` on the way;
+        # raises TimeoutError or EOFError if the worker must go
+        self.conn.send((fn, args))
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self.conn.poll(max(0, deadline - time.monotonic())):
+                raise multiprocessing.TimeoutError
+            kind, payload = self.conn.recv()
+            if kind != 'part':
+                return kind == 'ok', payload
+            parts.append(payload)
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _run_task(fn, args, timeout, parts=None):
+    """Run fn(*args) on an idle worker process and return its result.
+
+    If it has not finished `timeout` seconds after it started, its worker is killed and
+    multiprocessing.TimeoutError raised; tasks on other workers carry on undisturbed.
+    Whatever the task _emit()ted before that is appended to the list `parts`, if given.
+    """
+    parts = [] if parts is None else parts
+    global _slots
+    with _workers_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(PDF_WORKERS)
+        slots = _slots
+    with slots:
+        with _workers_lock:
+            worker = _idle.pop() if _idle else None
+        if worker is not None and not worker.process.is_alive():
+            worker.kill()
+            worker = None
+        if worker is None:
+            worker = _Worker()
+        try:
+            ok, result = worker.run(fn, args, timeout, parts)
+        except multiprocessing.TimeoutError:
+            worker.kill()
+            raise
+        except (EOFError, OSError):
+            # The worker died mid-task, e.g. killed by the OS for running out of memory
+            worker.kill()
+            raise ValueError("the file could not be parsed")
+        with _workers_lock:
+            _idle.append(worker)
+    if not ok:
+        raise result
+    return result
+
+
+def _submit(fn, *args, timeout, parts=None):
+    # _run_task on a dispatch thread; the Future's result() returns within `timeout` of the task starting
+    global _dispatch
+    with _workers_lock:
+        if _dispatch is None:
+            _dispatch = ThreadPoolExecutor(thread_name_prefix='extract')
+        dispatch = _dispatch
+    return dispatch.submit(_run_task, fn, args, timeout, parts)
+
+
+@atexit.register
+def _shutdown_workers():
+    with _workers_lock:
+        while _idle:
+            _idle.pop().kill()
+
+
+def _read_pages(reader, start, stop, deadline):
+    # Each page is also sent back as soon as it is read, so it survives a kill on a later page
+    pages = []
+    for i in range(start, stop):
+        if time.time() > deadline:
+            return pages, True
+        pages.append(reader.pages[i].extract_text() or "")
+        if _emit is not None:
+            _emit(pages[-1])
+    return pages, False
+
+
+def _extract_pages(data, start, stop):
+    # Worker task: one shard of a large PDF; returns (pages, timed_out)
+    return _read_pages(PdfReader(io.BytesIO(data)), start, stop, time.time() + DOC_TIMEOUT)
+
+
+def _docx_text(data, stats):
+    # The same parts as docx2txt.process, decompressed at most MAX_DOCX_XML_BYTES in total
+    budget = MAX_DOCX_XML_BYTES
+    text = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        parts = ([n for n in names if re.match(r'word/header[0-9]*.xml', n)] + ['word/document.xml']
+                 + [n for n in names if re.match(r'word/footer[0-9]*.xml', n)])
+        for name in parts:
+            with archive.open(name) as part:
+                xml = part.read(budget + 1)
+            if len(xml) > budget:
+                # Keep the runs of text that fit; the cut-off XML can no longer be parsed
+                stats['truncated'] = 'size'
+                text.extend(unescape(t) for t in re.findall(r'<w:t(?:\s[^>]*)?>([^<]*)</w:t>', xml[:budget].decode('utf-8', 'replace')))
+                break
+            budget -= len(xml)
+            text.append(xml2text(xml))
+    return ''.join(text)
+
+
+def _parse(data, filename, stats, shard_from=None):
+    """Parse a document in this process, within the limits above.
+
+    Returns None instead for a PDF of at least `shard_from` pages, for the caller to shard.
+    """
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"file is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    deadline = time.time() + DOC_TIMEOUT
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.pdf':
+        reader = PdfReader(io.BytesIO(data))
+        n_pages = len(reader.pages)
+        stats['pages'] = n_pages
+        if shard_from is not None and n_pages >= shard_from:
+            return None
+        if n_pages > MAX_PDF_PAGES:
+            stats['truncated'] = 'pages'
+        pages, timed_out = _read_pages(reader, 0, min(n_pages, MAX_PDF_PAGES), deadline)
+        if timed_out:
+            stats['truncated'] = 'time'
+        text = " ".join(pages)
+    elif ext == '.txt':
+        text = bytes(data).decode('utf-8', errors='replace')
+    else:
+        text = _docx_text(data, stats)
+    return text.strip() if text else ""
+
+
+def _parse_task(data, filename, shard_from=None):
+    # Worker task: the worker's stats are returned, since its dict is not shared
+    stats = {}
+    try:
+        return _parse(data, filename, stats, shard_from), stats
+    except PdfReadError as e:
+        # Callers handle unparsable files as ValueError, without having to import PyPDF2
+        raise ValueError(f"the file could not be parsed ({e})")
+
+
+def _extract_sharded(data, stats):
+    # One contiguous shard per worker, each with its own DOC_TIMEOUT; results are collected in page order
+    n_pages = min(stats['pages'], MAX_PDF_PAGES)
+    if stats['pages'] > MAX_PDF_PAGES:
+        stats['truncated'] = 'pages'
+    shard = -(-n_pages // PDF_WORKERS)
+    pending = []
+    for start in range(0, n_pages, shard):
+        read = []
+        pending.append((_submit(_extract_pages, data, start, min(start + shard, n_pages),
+                                timeout=DOC_TIMEOUT + KILL_GRACE, parts=read), read))
+    pages = []
+    for future, read in pending:
+        try:
+            shard_pages, timed_out = future.result()
+        except multiprocessing.TimeoutError:
+            # Killed inside a page: keep the pages it had read before that one
+            shard_pages, timed_out = read, True
+        pages.extend(shard_pages)
+        if timed_out:
+            stats['truncated'] = 'time'
+    return " ".join(pages).strip()
+
+
+def extract_text(data, filename, stats=None):
+    """Extract text straight from the uploaded bytes in a worker process; nothing is written to disk.
+
+    If `stats` is a dict, the page count of a PDF is stored in it under 'pages', and the
+    limit that cut the text short, if any, under 'truncated'.
+    """
+    stats = {} if stats is None else stats
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"file is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+
+    read = []
+    try:
+        text, worker_stats = _run_task(_parse_task, (data, filename, PARALLEL_MIN_PAGES), DOC_TIMEOUT + KILL_GRACE, read)
+        stats.update(worker_stats)
+        if text is None:
+            text = _extract_sharded(data, stats)
+    except multiprocessing.TimeoutError:
+        stats['truncated'] = 'time'
+        return " ".join(read).strip()
+    except MemoryError:
+        raise ValueError("file needs too much memory to parse")
+    return text
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def cached_text(conn, digest, touch=True):
+    # `touch` marks the entry as recently used, which is a write
+    row = conn.execute('SELECT text FROM text_cache WHERE content_hash = ?', (digest,)).fetchone()
+    if row is None or not touch:
+        return row[0] if row is not None else None
+    conn.execute('UPDATE text_cache SET last_used = ? WHERE content_hash = ?', (time.time(), digest))
+    conn.commit()
+    return row[0]
+
+
+def store_text(conn, digest, text):
+    size = len(text.encode('utf-8'))
+    conn.execute(
+        'INSERT OR REPLACE INTO text_cache (content_hash, text, size, last_used) VALUES (?, ?, ?, ?)',
+        (digest, text, size, time.time())
+    )
+    # Evict least recently used entries until the cache fits its byte budget again
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM text_cache').fetchone()[0]
+    if total > TEXT_CACHE_MAX_BYTES:
+        excess = total - TEXT_CACHE_MAX_BYTES
+        victims = []
+        for victim, victim_size in conn.execute('SELECT content_hash, size FROM text_cache ORDER BY last_used'):
+            if excess <= 0:
+                break
+            if victim == digest:
+                continue
+            victims.append((victim,))
+            excess -= victim_size
+        conn.executemany('DELETE FROM text_cache WHERE content_hash = ?', victims)
+    conn.commit()
+
+
+def extract_text_cached(conn, data, filename, stats=None):
+    """Extract text from an upload, skipping the parse when the same bytes were seen before."""
+    stats = {} if stats is None else stats
+    digest = content_hash(data)
+    text = cached_text(conn, digest)
+    if text is None:
+        text = extract_text(data, filename, stats=stats)
+        # Running out of time depends on load, so another attempt may read more
+        if stats.get('truncated') != 'time':
+            store_text(conn, digest, text)
+    else:
+        stats['cached'] = True
+    return text
+
+
+def extract_many(items):
+    """Extract many documents on the worker processes, one document per task.
+
+    `items` yields (key, data, filename) and is consumed lazily, with at most two
+    documents per worker in flight. Yields (key, text, stats, error) in input order;
+    a PDF killed by the time limit yields the pages read before that.
+    """
+    in_flight = deque()
+
+    def finish_oldest():
+        key, future, read = in_flight.popleft()
+        try:
+            return key, *future.result(), None
+        except multiprocessing.TimeoutError:
+            text = " ".join(read).strip()
+            if text:
+                return key, text, {'truncated': 'time'}, None
+            return key, None, {}, "timed out"
+        except MemoryError:
+            return key, None, {}, "file needs too much memory to parse"
+        except Exception as e:
+            return key, None, {}, str(e) or type(e).__name__
+
+    for key, data, filename in items:
+        read = []
+        in_flight.append((key, _submit(_parse_task, data, filename, timeout=DOC_TIMEOUT + KILL_GRACE, parts=read), read))
+        if len(in_flight) >= 2 * PDF_WORKERS:
+            yield finish_oldest()
+    while in_flight:
+        yield finish_oldest()
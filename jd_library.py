@@ -0,0 +1,91 @@
+import json
+import threading
+from collections import Counter
+
+import numpy as np
+
+from document import analyze, normalize
+from extraction import content_hash
+from scoring import pack_counts, top_k, unpack_counts
+from skills import get_matcher
+
+
+def hash_jd_text(text):
+    """Key for a JD's text, insensitive to case and whitespace."""
+    return content_hash(normalize(text).encode('utf-8'))
+
+
+def publish_jd(conn, model, title, text, user_id):
+    """Store a JD with its scoring inputs precomputed; call inside run_in_transaction.
+
+    Raw hashed term counts are stored rather than weights, so the JD is always
+    weighted with the corpus IDF current at scoring time.
+    """
+    doc = analyze(text)
+    X, terms = model.count_doc(doc)
+    matcher = get_matcher()
+    skills = matcher.find_doc(doc)
+    return conn.execute(
+        '''INSERT INTO jobs (job_title, description, posted_by, text_hash, cols, counts, terms, skills, skills_version)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        (title, text, user_id, hash_jd_text(text), *pack_counts(X), json.dumps(terms), json.dumps(skills), matcher.version)
+    ).lastrowid
+
+
+def load_jd(conn, model, job_id):
+    """(text, text hash, prepared JD for score_resume) of a published JD, or None."""
+    row = conn.execute(
+        'SELECT description, text_hash, cols, counts, terms, skills, skills_version FROM jobs WHERE id = ?', (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    if row['cols'] is None:
+        # Inserted without precomputed inputs; derive them from the text
+        from analysis import prepare_jd
+        return row['description'], hash_jd_text(row['description']), prepare_jd(model, row['description'])
+    terms = {int(col): term for col, term in json.loads(row['terms']).items()}
+    matcher = get_matcher()
+    if row['skills_version'] == matcher.version:
+        skills = Counter(json.loads(row['skills']))
+    else:
+        # Published before the last taxonomy change: its stored names may no longer exist
+        skills = matcher.find(row['description'])
+    return row['description'], row['text_hash'], (model.weight(unpack_counts([(row['cols'], row['counts'])])), terms, skills)
+
+
+_matrix = None  # (version, job ids, counts matrix)
+_matrix_lock = threading.Lock()
+
+
+def jd_matrix(conn, model):
+    """(job ids, counts matrix) of every published JD, one row each; rebuilt only when jobs change."""
+    global _matrix
+    # AUTOINCREMENT ids are never reused, so any publish or removal changes this
+    version = tuple(conn.execute('SELECT COUNT(*), MAX(id) FROM jobs').fetchone())
+    with _matrix_lock:
+        if _matrix is not None and _matrix[0] == version:
+            return _matrix[1], _matrix[2]
+    rows = conn.execute('SELECT id, description, cols, counts FROM jobs ORDER BY id').fetchall()
+    X = unpack_counts(
+        (row['cols'], row['counts']) if row['cols'] is not None
+        else pack_counts(model.count_doc(analyze(row['description']))[0])
+        for row in rows
+    )
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    with _matrix_lock:
+        _matrix = (version, ids, X)
+    return ids, X
+
+
+def match_jobs(conn, model, resume_counts, k=10):
+    """The k published JDs that best fit one resume, best first, as rows with a 'score' (0-100)."""
+    ids, X = jd_matrix(conn, model)
+    if not len(ids) or resume_counts is None or not resume_counts.nnz:
+        return []
+    # Weight with the current IDF; rows are then L2-normalised, so one mat-vec gives every cosine
+    scores = np.asarray((model.weight(X) @ model.weight(resume_counts).T).todense()).ravel() * 100
+    top = top_k(scores, k)
+    titles = dict(conn.execute(
+        f'SELECT id, job_title FROM jobs WHERE id IN ({", ".join("?" * len(top))})', ids[top].tolist()
+    ).fetchall())
+    return [{'id': int(ids[i]), 'job_title': titles.get(int(ids[i])), 'score': float(scores[i])} for i in top]
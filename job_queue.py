@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db import STALE_JOB_SECONDS, run_in_transaction
+
+# Analyses run off the Streamlit script thread; PDF parsing itself fans out to extraction's process pool
+JOB_WORKERS = max(2, min(8, os.cpu_count() or 1))
+JOBS_MAX_ROWS = 10000  # oldest jobs are pruned past this
+FAIL_RETRIES = 5  # attempts at recording a failed job
+FAIL_BACKOFF = 1.0  # seconds, doubled after every failed attempt
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='analysis')
+        return _executor
+
+
+def _update_job(job_id, **fields):
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    run_in_transaction(lambda conn: conn.execute(
+        f'UPDATE analysis_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+        (*fields.values(), job_id)
+    ))
+
+
+def _fail_job(job_id, error):
+    # The failure may itself be a busy DB, so this retries well past run_in_transaction's own
+    # backoff; if it still cannot be recorded, get_job reports the job failed once it goes stale
+    for attempt in range(FAIL_RETRIES):
+        try:
+            _update_job(job_id, status='failed', error=error)
+            return
+        except Exception:
+            if attempt == FAIL_RETRIES - 1:
+                logger.exception("could not record the failure of analysis job %s", job_id)
+                return
+            time.sleep(FAIL_BACKOFF * 2 ** attempt)
+
+
+def _run_job(job_id, user_id, filename, data, jd_text, jd_filename, jd_data, jd_id):
+    # Imported here so pages that only poll jobs never load sklearn/PyPDF2
+    from analysis import analyze_resume
+
+    try:
+        _update_job(job_id, status='running', progress=20)
+        result = analyze_resume(user_id, filename, data, jd_text, jd_filename, jd_data,
+                                progress=lambda pct: _update_job(job_id, progress=pct), jd_id=jd_id)
+        _update_job(job_id, status='done', progress=100, result=json.dumps(result))
+    except Exception as e:
+        _fail_job(job_id, str(e))
+
+
+def submit_analysis(user_id, filename, data, jd_text, jd_filename=None, jd_data=None, jd_id=None):
+    """Queue an analysis and return its job id; poll it with get_job."""
+    def queue(conn):
+        job_id = conn.execute(
+            "INSERT INTO analysis_jobs (user_id, filename, status, progress) VALUES (?, ?, 'queued', 0)",
+            (user_id, filename)
+        ).lastrowid
+        conn.execute('DELETE FROM analysis_jobs WHERE id <= ? - ?', (job_id, JOBS_MAX_ROWS))
+        return job_id
+
+    job_id = run_in_transaction(queue)
+    _get_executor().submit(_run_job, job_id, user_id, filename, data, jd_text, jd_filename, jd_data, jd_id)
+    return job_id
+
+
+def get_job(conn, job_id, user_id):
+    """The job's row; a queued or running job untouched for STALE_JOB_SECONDS is reported as failed.
+
+    Its thread died or could not record how it ended, so it would otherwise be polled forever.
+    """
+    return conn.execute('''
+        SELECT id, progress, result,
+            CASE WHEN stale THEN 'failed' ELSE status END AS status,
+            CASE WHEN stale THEN 'the analysis stopped responding' ELSE error END AS error
+        FROM (
+            SELECT *, status IN ('queued', 'running') AND updated_at < datetime('now', ?) AS stale
+            FROM analysis_jobs WHERE id = ? AND user_id = ?
+        )
+    ''', (f'-{STALE_JOB_SECONDS} seconds', job_id, user_id)).fetchone()
@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+
+METRICS_MAX_ROWS = 100000  # oldest stage timings are pruned past this
+
+# Analyze pipeline stages, in the order they run
+STAGES = ['extract_jd', 'score_cache', 'extract_resume', 'vectorize', 'db_write', 'total']
+
+
+class StageTimer:
+    """Collects per-stage wall-clock timings for one analysis."""
+
+    def __init__(self, file_size=None):
+        self.file_size = file_size
+        self.page_count = None
+        self.timings = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, (time.perf_counter() - start) * 1000))
+
+    def save(self, conn):
+        """Write the timings plus a 'total' row; call inside run_in_transaction."""
+        now = time.time()
+        rows = self.timings + [('total', (time.perf_counter() - self.started) * 1000)]
+        conn.executemany(
+            'INSERT INTO stage_metrics (stage, duration_ms, file_size, page_count, created_at) VALUES (?, ?, ?, ?, ?)',
+            [(name, duration, self.file_size, self.page_count, now) for name, duration in rows]
+        )
+        conn.execute('DELETE FROM stage_metrics WHERE id <= (SELECT MAX(id) FROM stage_metrics) - ?', (METRICS_MAX_ROWS,))
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(conn, since=0.0):
+    """Per-stage count, p50/p95/mean latency (ms) and throughput (per minute) since a Unix time."""
+    rows = conn.execute(
+        'SELECT stage, duration_ms, created_at FROM stage_metrics WHERE created_at >= ? ORDER BY stage, duration_ms',
+        (since,)
+    ).fetchall()
+    by_stage = {}
+    first = {}
+    last = {}
+    for stage, duration, created in rows:
+        by_stage.setdefault(stage, []).append(duration)
+        first[stage] = min(first.get(stage, created), created)
+        last[stage] = max(last.get(stage, created), created)
+
+    summary = []
+    for stage in sorted(by_stage, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+        durations = by_stage[stage]
+        # Throughput over the span actually covered by samples, at least one minute
+        span_min = max((last[stage] - first[stage]) / 60, 1.0)
+        summary.append({
+            'stage': stage,
+            'count': len(durations),
+            'p50_ms': _percentile(durations, 50),
+            'p95_ms': _percentile(durations, 95),
+            'mean_ms': sum(durations) / len(durations),
+            'per_min': len(durations) / span_min,
+        })
+    return summary
+
+
+def render_text(summary):
+    """Plain-text exposition of a summary, one metric per line."""
+    lines = []
+    for s in summary:
+        for key in ('count', 'p50_ms', 'p95_ms', 'mean_ms', 'per_min'):
+            lines.append(f'analysis_stage_{key}{{stage="{s["stage"]}"}} {s[key]:.3f}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,281 @@
+import json
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+from db import CANDIDATE_COLUMNS
+from document import analyze
+
+# Fixed hashed feature space, so vectors stay comparable as the corpus grows
+N_FEATURES = 2 ** 20
+
+
+def hash_term(term):
+    return murmurhash3_32(term, positive=True) % N_FEATURES
+
+
+def pack_counts(X):
+    """A one-row counts matrix as (columns, counts) BLOBs for storage."""
+    return X.indices.astype(np.int32).tobytes(), X.data.astype(np.int32).tobytes()
+
+
+def unpack_counts(pairs):
+    """Stack stored (columns, counts) BLOB pairs back into a CSR counts matrix, one row per pair."""
+    indptr = [0]
+    indices = []
+    data = []
+    for cols, counts in pairs:
+        indices.append(np.frombuffer(cols, dtype=np.int32))
+        data.append(np.frombuffer(counts, dtype=np.int32))
+        indptr.append(indptr[-1] + len(indices[-1]))
+    return sp.csr_matrix(
+        (np.concatenate(data).astype(np.float64) if data else np.empty(0),
+         np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+         np.array(indptr)),
+        shape=(len(indptr) - 1, N_FEATURES)
+    )
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, without sorting the rest."""
+    k = min(int(k), len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class CorpusModel:
+    """TF-IDF over all stored resumes, with document frequencies persisted in the DB.
+
+    IDF is updated incrementally as resumes are added; scoring a request only
+    needs a transform, never a refit.
+    """
+
+    def __init__(self):
+        self.df = np.zeros(N_FEATURES, dtype=np.int64)
+        self.n_docs = 0
+        self.lock = threading.Lock()
+
+    def load(self, conn, persist=True):
+        # With persist=False, frequencies that have to be backfilled are kept in memory only
+        row = conn.execute("SELECT value FROM corpus_meta WHERE key = 'n_docs'").fetchone()
+        if row is None:
+            self._backfill(conn, persist)
+            return
+        df = np.zeros(N_FEATURES, dtype=np.int64)
+        cols = conn.execute('SELECT col, df FROM corpus_df').fetchall()
+        if cols:
+            idx, counts = zip(*cols)
+            df[list(idx)] = counts
+        self.df = df
+        self.n_docs = row[0]
+
+    def refresh(self, conn):
+        # Another process may have added resumes since we loaded
+        row = conn.execute("SELECT value FROM corpus_meta WHERE key = 'n_docs'").fetchone()
+        if row is None or row[0] != self.n_docs:
+            with self.lock:
+                self.load(conn)
+
+    def _backfill(self, conn, persist=True):
+        # First run against an existing DB: seed frequencies from the resumes already stored
+        rows = conn.execute("""
+            SELECT t.text AS full_text, f.metadata
+            FROM files f LEFT JOIN resume_text t ON t.file_id = f.id
+            WHERE f.file_type = 'resume'
+        """).fetchall()
+        texts = [r[0] or json.loads(r[1])['text'] for r in rows]
+        X = self.counts(texts)
+        df = np.bincount(X.indices, minlength=N_FEATURES).astype(np.int64)
+        if persist:
+            nz = np.flatnonzero(df)
+            conn.executemany('INSERT OR REPLACE INTO corpus_df (col, df) VALUES (?, ?)',
+                             zip(nz.tolist(), df[nz].tolist()))
+            conn.execute("INSERT OR REPLACE INTO corpus_meta (key, value) VALUES ('n_docs', ?)", (len(texts),))
+            conn.commit()
+        self.df = df
+        self.n_docs = len(texts)
+
+    def counts(self, texts):
+        """Raw hashed term counts, one CSR row per text."""
+        return self._rows(analyze(text).counts for text in texts)
+
+    def _rows(self, counters):
+        indptr = [0]
+        indices = []
+        data = []
+        for tf in counters:
+            indices.extend(hash_term(t) for t in tf)
+            data.extend(tf.values())
+            indptr.append(len(indices))
+        X = sp.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr)),
+            shape=(len(indptr) - 1, N_FEATURES)
+        )
+        X.sum_duplicates()
+        return X
+
+    def idf(self, cols):
+        # Same smoothed IDF as TfidfVectorizer's default
+        return np.log((1 + self.n_docs) / (1 + self.df[cols])) + 1
+
+    def weight(self, X):
+        X = X.astype(np.float64, copy=True)
+        X.data *= self.idf(X.indices)
+        return normalize(X, copy=False)
+
+    def transform(self, texts):
+        return self.weight(self.counts(texts))
+
+    def vectorize(self, text):
+        """Weighted vector for one text plus a {column: term} map of its terms."""
+        return self.vectorize_doc(analyze(text))
+
+    def vectorize_doc(self, doc):
+        """vectorize() for an already analysed document.Document."""
+        X, terms = self.count_doc(doc)
+        return self.weight(X), terms
+
+    def count_doc(self, doc):
+        """Unweighted counts row and {column: term} map for one analysed document."""
+        tf = doc.counts
+        terms = {}
+        for term in sorted(tf):
+            terms.setdefault(hash_term(term), term)
+        return self._rows([tf]), terms
+
+    def add_document(self, conn, vec):
+        """Count one new resume in the stored document frequencies; the caller commits.
+
+        Returns its columns, for apply_added() once the transaction has committed.
+        """
+        cols = np.unique(vec.indices).tolist()
+        conn.executemany(
+            'INSERT INTO corpus_df (col, df) VALUES (?, 1) ON CONFLICT(col) DO UPDATE SET df = df + 1',
+            [(c,) for c in cols]
+        )
+        conn.execute("UPDATE corpus_meta SET value = value + 1 WHERE key = 'n_docs'")
+        return cols
+
+    def apply_added(self, added):
+        """Count committed add_document() columns in the in-memory frequencies.
+
+        Only after the commit: a rolled-back or retried transaction must leave them untouched.
+        """
+        with self.lock:
+            for cols in added:
+                self.df[cols] += 1
+            self.n_docs += len(added)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model(conn):
+    """Process-wide corpus model, loaded from the DB on first use."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            model = CorpusModel()
+            model.load(conn)
+            _model = model
+            return model
+    _model.refresh(conn)
+    return _model
+
+
+def skill_diff(resume_vec, jd_vec, jd_terms):
+    """Split the JD's terms into (matched, missing) lists, each ordered by JD weight."""
+    # Work on the sparse index sets directly; nothing is densified
+    order = np.argsort(-jd_vec.data, kind='stable')
+    cols = jd_vec.indices[order]
+    present = np.isin(cols, resume_vec.indices, assume_unique=True)
+    matched = [jd_terms[c] for c in cols[present].tolist()]
+    missing = [jd_terms[c] for c in cols[~present].tolist()]
+    return matched, missing
+
+
+_resumes = None  # (last file id seen, file ids, counts matrix, superseded mask)
+_resumes_lock = threading.Lock()
+
+
+def resume_matrix(conn, model):
+    """(file ids, counts matrix, superseded mask) of every stored resume, one row each.
+
+    Built from the stored counts once per process; resumes added since are appended.
+    """
+    # One read transaction: MAX(id), the new rows and the superseded ids must all come from the
+    # same snapshot, or a resume committed in between would be appended twice
+    snapshot = not conn.in_transaction
+    if snapshot:
+        conn.execute('BEGIN')
+    try:
+        return _read_resumes(conn, model)
+    finally:
+        if snapshot:
+            conn.commit()
+
+
+def _read_resumes(conn, model):
+    global _resumes
+    # Resumes are never deleted, and a resume is only superseded when a newer one is added
+    last_id = conn.execute('SELECT MAX(id) FROM files').fetchone()[0] or 0
+    with _resumes_lock:
+        cached = _resumes
+    # Another thread may already have cached a newer snapshot than ours
+    if cached is not None and cached[0] >= last_id:
+        return cached[1], cached[2], cached[3]
+    since, ids, X = (cached[0], cached[1], cached[2]) if cached is not None else (0, np.empty(0, dtype=np.int64), None)
+    rows = conn.execute('''
+        SELECT f.id, t.cols, t.counts, t.text AS full_text, f.metadata
+        FROM files f LEFT JOIN resume_text t ON t.file_id = f.id
+        WHERE f.file_type = 'resume' AND f.id > ?
+        ORDER BY f.id
+    ''', (since,)).fetchall()
+    if rows:
+        # Rows stored before counts were kept are counted from their text, once
+        new = unpack_counts(
+            (row['cols'], row['counts']) if row['cols'] is not None
+            else pack_counts(model.count_doc(analyze(row['full_text'] or json.loads(row['metadata'])['text']))[0])
+            for row in rows
+        )
+        ids = np.concatenate([ids, np.array([row['id'] for row in rows], dtype=np.int64)])
+        X = sp.vstack([X, new], format='csr') if X is not None else new
+    if X is None:
+        X = unpack_counts([])
+    superseded = np.isin(ids, [row[0] for row in conn.execute('SELECT id FROM files WHERE superseded = 1')])
+    with _resumes_lock:
+        _resumes = (last_id, ids, X, superseded)
+    return ids, X, superseded
+
+
+def rank_resumes(conn, model, jd_text, k=20, collapse=True):
+    """The k stored resumes that best fit one JD, best first, as rows with a 'score' (0-100).
+
+    With `collapse`, resumes superseded by a newer near-duplicate from the same owner are left out.
+    """
+    ids, X, superseded = resume_matrix(conn, model)
+    q, _ = model.vectorize(jd_text or '')
+    if not len(ids) or not q.nnz:
+        return []
+    # Empty documents can never match, so they are never listed
+    keep = np.diff(X.indptr) > 0
+    if collapse:
+        keep &= ~superseded
+    candidates = np.flatnonzero(keep)
+    # Weighted with the current IDF; rows are then L2-normalised, so one mat-vec gives every cosine
+    scores = np.asarray((model.weight(X) @ q.T).todense()).ravel() * 100
+    top = candidates[top_k(scores[candidates], k)]
+    if not len(top):
+        return []
+    rows = {row['id']: row for row in conn.execute(f'''
+        SELECT f.id, f.filename, f.upload_date, {CANDIDATE_COLUMNS}
+        FROM files f LEFT JOIN users u ON f.user_id = u.id
+        WHERE f.id IN ({", ".join("?" * len(top))})
+    ''', ids[top].tolist())}
+    return [{**dict(rows[int(ids[i])]), 'score': float(scores[i])} for i in top]
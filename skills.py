@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, deque
+
+from document import Document, normalize
+
+SKILLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'skills.json')
+# Bare names that are also ordinary words ("I excel at"), so they only count as list items
+LISTED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'skills_listed.json')
+
+# Characters that separate the items of an inline list, as in "Skills: Spark, Excel"
+LIST_SEPARATORS = ',;|\u2022'
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _joins(text, i, step):
+    """Whether text[i] glues a match to the word beyond it, `step` pointing away from the match.
+
+    Besides word characters that is a dot followed by one, so "js" is not found
+    inside "node.js" while "react." at the end of a sentence still counts.
+    """
+    ch = text[i]
+    if _is_word_char(ch):
+        return True
+    j = i + step
+    return ch == '.' and 0 <= j < len(text) and _is_word_char(text[j])
+
+
+def _in_list(text, start, end, spans):
+    # Inside a list span (the skills section), or next to a separator; the text is normalised,
+    # so at most one space stands between the name and its neighbour
+    for lo, hi in spans:
+        if lo <= start and end <= hi:
+            return True
+    i = start - 1
+    if i >= 0 and text[i] == ' ':
+        i -= 1
+    if i >= 0 and (text[i] in LIST_SEPARATORS or text[i] == ':'):
+        return True
+    j = end + 1 if end < len(text) and text[end] == ' ' else end
+    return j < len(text) and text[j] in LIST_SEPARATORS
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every name and synonym in a skill taxonomy.
+
+    `taxonomy` maps a canonical skill to its synonyms. `listed` does the same
+    for names that only count as the item of a list (see _in_list). Compiling
+    is done once; a scan is a single pass over the text whatever the number
+    of patterns. `version` identifies the taxonomy, so skills found with an
+    older one can be told apart.
+    """
+
+    def __init__(self, taxonomy, listed=None):
+        self.version = hashlib.sha256(json.dumps([taxonomy, listed or {}], sort_keys=True).encode('utf-8')).hexdigest()
+        # State 0 is the root; goto[s] maps a character to the next state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]  # (canonical, pattern length, list-only) ending at this state
+        self.link = [0]       # nearest proper suffix state that has an output
+        for canonical, synonyms in taxonomy.items():
+            for pattern in [canonical, *synonyms]:
+                self._add(normalize(pattern), canonical)
+        for canonical, names in (listed or {}).items():
+            for pattern in names:
+                self._add(normalize(pattern), canonical, True)
+        self._build()
+
+    def _add(self, pattern, canonical, list_only=False):
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.link.append(0)
+            state = nxt
+        # On a name clash the first taxonomy entry wins
+        if self.output[state] is None:
+            self.output[state] = (canonical, len(pattern), list_only)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.link[nxt] = target if self.output[target] else self.link[target]
+
+    def find(self, text):
+        """Canonical skills in `text` as a Counter of occurrences, in first-seen order
+        (skills only found by a list-only name come last).
+
+        Matches must sit on word boundaries, so "java" is not found in "javascript"
+        nor "js" in "node.js".
+        """
+        return self.find_doc(Document(text))
+
+    def find_doc(self, doc):
+        """find() for an already analysed document.Document."""
+        span = doc.sections.get('skills')
+        return self.scan(doc.text, [span] if span else ())
+
+    def scan(self, text, spans=()):
+        # `text` must already be normalize()d, the form the patterns were compiled in;
+        # list-only names count inside `spans` or next to a list separator
+        goto, fail, output, link = self.goto, self.fail, self.output, self.link
+        found = Counter()
+        matched = []  # (start, end, canonical) of every full-name match
+        listed = []   # list-only matches, counted once the full-name ones are known
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if end < len(text) and _joins(text, end, 1):
+                continue
+            s = state if output[state] else link[state]
+            counted = set()
+            while s:
+                canonical, length, list_only = output[s]
+                start = end - length
+                if start == 0 or not _joins(text, start - 1, -1):
+                    if list_only:
+                        listed.append((start, end, canonical))
+                    elif canonical not in counted:
+                        # Longest first: "kafka" at the end of "apache kafka" is the same mention again
+                        found[canonical] += 1
+                        counted.add(canonical)
+                        matched.append((start, end, canonical))
+                s = link[s]
+        for start, end, canonical in listed:
+            # "rust" in "rust language" is part of a longer name of the same skill, not a second mention
+            if _in_list(text, start, end, spans) and not any(
+                    other == canonical and lo < end and start < hi for lo, hi, other in matched):
+                found[canonical] += 1
+        return found
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Process-wide matcher compiled from SKILLS_PATH and LISTED_PATH on first use."""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            with open(SKILLS_PATH, encoding='utf-8') as f:
+                taxonomy = json.load(f)
+            with open(LISTED_PATH, encoding='utf-8') as f:
+                _matcher = SkillMatcher(taxonomy, json.load(f))
+        return _matcher
+
+
+def ranked(found):
+    """Skills ordered by how often they occur, ties in first-seen order."""
+    return [skill for skill, _ in sorted(found.items(), key=lambda item: -item[1])]
+
+
+def skill_match(resume_skills, jd_skills):
+    """Split the JD's skills into (matched, missing) lists, each ordered by JD frequency."""
+    matched = []
+    missing = []
+    for skill in ranked(jd_skills):
+        (matched if skill in resume_skills else missing).append(skill)
+    return matched, missing
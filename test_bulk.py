@@ -0,0 +1,48 @@
+import io
+import struct
+import zipfile
+
+from bulk import candidate_identity, ingest_zip
+
+JD = 'Python developer with Django and SQL'
+
+
+def patch_member(data, name, offset, value):
+    # Overwrite a 2-byte field of `name`'s central directory entry
+    i = data.find(b'PK\x01\x02')
+    while i != -1:
+        length = struct.unpack('<H', data[i + 28:i + 30])[0]
+        if data[i + 46:i + 46 + length] == name.encode():
+            data[i + offset:i + offset + 2] = struct.pack('<H', value)
+            return
+        i = data.find(b'PK\x01\x02', i + 1)
+    raise KeyError(name)
+
+
+def test_unreadable_members_are_reported_per_file(conn):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('good.txt', 'Jane Doe\njane@example.com\nPython and Django developer')
+        archive.writestr('encrypted.txt', 'secret')
+        archive.writestr('method.txt', 'unknown compression')
+        archive.writestr('corrupt.txt', 'python developer ' * 200, compress_type=zipfile.ZIP_DEFLATED)
+        archive.writestr('also_good.txt', 'John Roe\nSQL and Python')
+    data = bytearray(buffer.getvalue())
+    patch_member(data, 'encrypted.txt', 8, 0x1)   # general purpose flags: encrypted
+    patch_member(data, 'method.txt', 10, 99)      # compression method
+    info = zipfile.ZipFile(io.BytesIO(bytes(data))).getinfo('corrupt.txt')
+    start = info.header_offset + 30 + len('corrupt.txt')
+    data[start + 2:start + 12] = bytes(b ^ 0xff for b in data[start + 2:start + 12])
+
+    stored, errors = ingest_zip(bytes(data), JD, None)
+    assert stored == 2
+    assert sorted(errors) == [('corrupt.txt', 'the file is damaged in the archive'),
+                              ('encrypted.txt', 'the file is encrypted'),
+                              ('method.txt', 'unsupported compression method')]
+    rows = conn.execute('SELECT filename, candidate_name, candidate_email FROM files ORDER BY id').fetchall()
+    assert [tuple(row) for row in rows] == [('good.txt', 'Jane Doe', 'jane@example.com'), ('also_good.txt', 'John Roe', None)]
+
+
+def test_candidate_identity_falls_back_to_the_filename():
+    assert candidate_identity('jane_doe_resume_final.pdf', 'Skills\nPython') == ('Jane Doe', None)
+    assert candidate_identity('cv.pdf', 'Ana Lima\nana.lima@Example.com') == ('Ana Lima', 'ana.lima@example.com')
@@ -0,0 +1,43 @@
+import pytest
+
+import cli
+import db
+import extraction
+
+
+@pytest.fixture
+def run(conn, monkeypatch, capsys):
+    # main() sets both globals; monkeypatch puts them back afterwards
+    monkeypatch.setattr(extraction, 'PDF_WORKERS', extraction.PDF_WORKERS)
+    monkeypatch.setattr(db, 'DATABASE', db.DATABASE)
+
+    def run(*argv):
+        try:
+            code = cli.main([*argv, '--db', db.DATABASE, '--workers', '2'])
+        except SystemExit as e:
+            code = e.code
+        captured = capsys.readouterr()
+        return code, captured.out, captured.err
+    return run
+
+
+def test_unreadable_jd_is_a_usage_error(run, tmp_path):
+    code, _, err = run(str(tmp_path / 'cv.txt'), '--jd', str(tmp_path / 'missing.pdf'), '--dry-run')
+    assert code == 2 and 'cannot read' in err and 'missing.pdf' in err
+
+
+def test_unparsable_jd_is_a_usage_error(run, tmp_path):
+    jd = tmp_path / 'jd.docx'
+    jd.write_bytes(b'not a docx')
+    code, _, err = run(str(tmp_path / 'cv.txt'), '--jd', str(jd), '--dry-run')
+    assert code == 2 and 'cannot read' in err
+
+
+def test_unreadable_resumes_are_error_rows(run, tmp_path):
+    resume = tmp_path / 'cv.txt'
+    resume.write_text('Jane Doe\nPython developer')
+    code, out, _ = run(str(resume), str(tmp_path / 'gone.txt'), '--jd-text', 'Python developer', '--dry-run')
+    rows = out.splitlines()
+    assert code == 1
+    assert rows[0] == ','.join(cli.CSV_COLUMNS)
+    assert rows[1].startswith('cv.txt,') and rows[2].startswith('gone.txt,,')
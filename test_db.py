@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from db import (RESUME_SORTS, SNIPPET_END, SNIPPET_START, fetch_resume_page, get_resume_stats, init_resume_stats,
+                match_expression, run_in_transaction, search_resumes)
+
+
+def add_resume(conn, score, upload_date='2024-01-01 10:00:00', text=None, superseded=0, file_type='resume'):
+    cur = conn.execute(
+        'INSERT INTO files (filename, file_type, analysis_score, metadata, upload_date, superseded) VALUES (?, ?, ?, ?, ?, ?)',
+        ('cv.pdf', file_type, score, json.dumps({'text': text or ''}), upload_date, superseded)
+    )
+    if text is not None:
+        conn.execute('INSERT INTO resume_text (file_id, text) VALUES (?, ?)', (cur.lastrowid, text))
+    conn.commit()
+    return cur.lastrowid
+
+
+def all_pages(conn, sort, limit, **filters):
+    rows, after = [], None
+    while True:
+        page = fetch_resume_page(conn, sort, after, limit, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = (page[-1]['sort_key'], page[-1]['id'])
+
+
+@pytest.fixture
+def tied(conn):
+    # Few distinct scores and dates, so most pages end in the middle of a run of ties
+    for i in range(23):
+        add_resume(conn, [50, 70, 90][i % 3], f'2024-01-0{1 + i % 2} 10:00:00', superseded=i % 4 == 0)
+    return conn
+
+
+@pytest.mark.parametrize('sort', list(RESUME_SORTS))
+@pytest.mark.parametrize('limit', [1, 4, 7, 25])
+def test_pages_walk_every_resume_once_in_order(tied, sort, limit):
+    column, direction = RESUME_SORTS[sort]
+    key = 'analysis_score' if column == 'f.analysis_score' else 'upload_date'
+    expected = sorted(tied.execute("SELECT id, analysis_score, upload_date FROM files").fetchall(),
+                      key=lambda row: (row[key], row['id']), reverse=direction == 'DESC')
+    assert [row['id'] for row in all_pages(tied, sort, limit)] == [row['id'] for row in expected]
+
+
+@pytest.mark.parametrize('sort', list(RESUME_SORTS))
+def test_pages_respect_filters(tied, sort):
+    rows = all_pages(tied, sort, 3, min_score=60, max_score=80, collapse=True)
+    ids = {row['id'] for row in rows}
+    assert len(ids) == len(rows)
+    assert ids == {row[0] for row in tied.execute(
+        'SELECT id FROM files WHERE analysis_score = 70 AND superseded = 0')}
+
+
+def test_date_range_includes_the_whole_last_day(tied):
+    rows = all_pages(tied, 'Newest first', 5, date_from='2024-01-01', date_to='2024-01-01')
+    assert rows and {row['upload_date'] for row in rows} == {'2024-01-01 10:00:00'}
+
+
+def expected_stats(conn):
+    scores = [row[0] for row in conn.execute("SELECT analysis_score FROM files WHERE file_type = 'resume'")]
+    return {
+        'total': len(scores),
+        'high': sum(s >= 80 for s in scores),
+        'medium': sum(60 <= s < 80 for s in scores),
+        'low': sum(s < 60 for s in scores),
+        'avg': sum(scores) / len(scores) if scores else 0,
+    }
+
+
+def test_resume_stats_follow_inserts_and_deletes(conn):
+    assert get_resume_stats(conn) == pytest.approx(expected_stats(conn))
+    ids = [add_resume(conn, score) for score in (85, 80, 79.5, 60, 59, 10)]
+    add_resume(conn, 95, file_type='jd')
+    assert get_resume_stats(conn) == pytest.approx(expected_stats(conn))
+    conn.execute('DELETE FROM files WHERE id IN (?, ?)', (ids[0], ids[3]))
+    conn.commit()
+    assert get_resume_stats(conn) == pytest.approx(expected_stats(conn))
+
+
+def test_resume_stats_roll_back_with_the_insert(conn):
+    add_resume(conn, 70)
+    before = get_resume_stats(conn)
+
+    def insert_then_fail(conn):
+        conn.execute("INSERT INTO files (filename, file_type, analysis_score) VALUES ('cv.pdf', 'resume', 90)")
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        run_in_transaction(insert_then_fail)
+    assert get_resume_stats(conn) == before
+
+
+def test_resume_stats_seeded_from_existing_rows(conn):
+    for score in (90, 65, 20):
+        add_resume(conn, score)
+    conn.execute('DROP TABLE resume_stats')
+    conn.commit()
+    init_resume_stats(conn)
+    assert get_resume_stats(conn) == pytest.approx(expected_stats(conn))
+
+
+def found(conn, query, **kwargs):
+    return [row['id'] for row in search_resumes(conn, query, **kwargs)]
+
+
+def test_search_index_follows_resume_text(conn):
+    first = add_resume(conn, 70, text='Built Kafka pipelines and Airflow DAGs')
+    second = add_resume(conn, 70, text='Frontend work in React and TypeScript')
+    assert found(conn, 'kafka') == [first]
+    assert found(conn, 'react typescript') == [second]
+    assert found(conn, 'kafka react') == []
+
+    conn.execute('UPDATE resume_text SET text = ? WHERE file_id = ?', ('Moved on to Rust services', first))
+    conn.commit()
+    assert found(conn, 'kafka') == []
+    assert found(conn, 'rust') == [first]
+
+    conn.execute('DELETE FROM resume_text WHERE file_id = ?', (second,))
+    conn.commit()
+    assert found(conn, 'react') == []
+    # Raises if the index and resume_text have drifted apart
+    conn.execute("INSERT INTO resume_fts (resume_fts) VALUES ('integrity-check')")
+
+
+def test_search_snippets_stemming_and_collapse(conn):
+    old = add_resume(conn, 70, text='Managed deployments with Docker', superseded=1)
+    new = add_resume(conn, 70, text='Managing deployments with Docker and Kubernetes')
+    assert sorted(found(conn, 'manage')) == [old, new]
+    assert found(conn, 'docker', collapse=True) == [new]
+    snippet = search_resumes(conn, 'kubernetes')[0]['snippet']
+    assert f'{SNIPPET_START}Kubernetes{SNIPPET_END}' in snippet
+
+
+@pytest.mark.parametrize('query, expression', [
+    ('c++ node.js', '"c" "node" "js"'),
+    ('"unterminated OR', '"unterminated" "OR"'),
+    ('  ++ ', None),
+])
+def test_match_expression_quotes_every_word(query, expression):
+    assert match_expression(query) == expression
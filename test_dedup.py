@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+import pytest
+
+import db
+from db import cluster_info
+from dedup import DUP_THRESHOLD, NUM_PERM, index_resume, minhash
+from document import Document
+
+BASE = ' '.join(f'word{i}' for i in range(200))
+
+
+def signature(text):
+    return minhash(Document(text))
+
+
+def add(conn, sig, user_id=None, email=None):
+    file_id = conn.execute(
+        "INSERT INTO files (user_id, filename, file_type, analysis_score, candidate_email) VALUES (?, 'cv.pdf', 'resume', 50, ?)",
+        (user_id, email)
+    ).lastrowid
+    index_resume(conn, file_id, sig)
+    conn.commit()
+    return file_id
+
+
+def state(conn, file_id):
+    row = conn.execute('SELECT cluster_id, superseded FROM files WHERE id = ?', (file_id,)).fetchone()
+    return row['cluster_id'], row['superseded']
+
+
+def test_minhash_estimates_similarity():
+    base = signature(BASE)
+    edited = signature(BASE.replace('word100 ', 'changed '))
+    other = signature(' '.join(f'other{i}' for i in range(200)))
+    assert base.shape == (NUM_PERM,)
+    assert np.mean(base == edited) >= DUP_THRESHOLD
+    assert np.mean(base == other) < 0.1
+    assert signature('too short') is None
+
+
+def test_new_version_supersedes_the_same_users_earlier_one(conn):
+    first = add(conn, signature(BASE), user_id=1)
+    second = add(conn, signature(BASE + ' word200 word201'), user_id=1)
+    assert state(conn, first) == (first, 1)
+    assert state(conn, second) == (first, 0)
+    assert cluster_info(conn, [first]) == {first: (2, 1)}
+
+
+def test_other_owners_share_the_cluster_without_superseding(conn):
+    mine = add(conn, signature(BASE), user_id=1)
+    theirs = add(conn, signature(BASE), user_id=2)
+    unrelated = add(conn, signature(' '.join(f'other{i}' for i in range(200))), user_id=1)
+    assert state(conn, mine) == (mine, 0)
+    assert state(conn, theirs) == (mine, 0)
+    assert state(conn, unrelated) == (unrelated, 0)
+    assert cluster_info(conn, [mine, unrelated, None]) == {mine: (2, 2), unrelated: (1, 1)}
+
+
+@pytest.mark.parametrize('emails, superseded', [
+    (('a@example.com', 'a@example.com'), 1),
+    (('a@example.com', 'b@example.com'), 0),
+    ((None, None), 0),
+])
+def test_bulk_imports_are_owned_by_their_candidate(conn, emails, superseded):
+    first = add(conn, signature(BASE), email=emails[0])
+    add(conn, signature(BASE), email=emails[1])
+    assert state(conn, first) == (first, superseded)
+
+
+def test_a_bridging_resume_merges_clusters(conn):
+    rng = np.random.default_rng(1)
+    a = rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+    c = rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+    c[40:88] = a[40:88]  # 48/128 agree: related, but below the threshold
+    b = c.copy()
+    b[:88] = a[:88]      # 88/128 agree with each of a and c
+    first, second = add(conn, a, user_id=1), add(conn, c, user_id=2)
+    assert state(conn, second) == (second, 0)
+    bridge = add(conn, b, user_id=3)
+    assert {state(conn, file_id) for file_id in (first, second, bridge)} == {(first, 0)}
+    assert cluster_info(conn, [first]) == {first: (3, 3)}
+
+
+def add_legacy(conn, text, user_id, full_text=True):
+    # A resume stored before signatures existed; older ones only have the metadata sample
+    file_id = conn.execute(
+        "INSERT INTO files (user_id, filename, file_type, analysis_score, metadata) VALUES (?, 'cv.pdf', 'resume', 50, ?)",
+        (user_id, json.dumps({'text': text[:500]}))
+    ).lastrowid
+    if full_text:
+        conn.execute('INSERT INTO resume_text (file_id, text) VALUES (?, ?)', (file_id, text))
+    conn.commit()
+    return file_id
+
+
+def test_init_db_clusters_resumes_stored_before_signatures(conn):
+    old = add_legacy(conn, BASE, user_id=1)
+    short = add_legacy(conn, 'too short', user_id=1)
+    sample = add_legacy(conn, ' '.join(f'other{i}' for i in range(60)), user_id=2, full_text=False)
+    copy = add_legacy(conn, ' '.join(f'other{i}' for i in range(60)), user_id=3)
+    new = add_legacy(conn, BASE + ' word200', user_id=1)
+    conn.execute('DROP TABLE resume_minhash')
+    conn.execute('DROP TABLE resume_lsh')
+    conn.commit()
+
+    db.init_db()
+    assert state(conn, old) == (old, 1)
+    assert state(conn, new) == (old, 0)
+    assert state(conn, short) == (None, 0)
+    assert state(conn, sample) == state(conn, copy) == (sample, 0)
+    assert conn.execute('SELECT COUNT(*) FROM resume_minhash').fetchone()[0] == 4
+
+
+def test_an_older_resume_indexed_late_does_not_supersede_newer_ones(conn):
+    new = add(conn, signature(BASE + ' word200'), user_id=1)
+    # A lower id than the resume already indexed, as a backfilled legacy row has
+    old = conn.execute(
+        "INSERT INTO files (id, user_id, filename, file_type, analysis_score) VALUES (?, 1, 'cv.pdf', 'resume', 50)",
+        (new - 1,)
+    ).lastrowid
+    index_resume(conn, old, signature(BASE))
+    conn.commit()
+    assert state(conn, old) == (old, 1)
+    assert state(conn, new) == (old, 0)
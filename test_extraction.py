@@ -0,0 +1,46 @@
+import multiprocessing
+import time
+
+import pytest
+
+import extraction
+
+
+# Worker tasks are imported by the spawned workers, so this module keeps its imports light
+
+
+def emit_then_hang(pages):
+    # Worker task: reads `pages` pages, then gets stuck on the next one
+    for i in range(pages):
+        extraction._emit(f'page {i}')
+    time.sleep(60)
+
+
+def test_parts_sent_before_a_kill_are_kept():
+    read = []
+    with pytest.raises(multiprocessing.TimeoutError):
+        extraction._run_task(emit_then_hang, (3,), 5, read)
+    assert read == ['page 0', 'page 1', 'page 2']
+
+
+def test_other_workers_survive_a_kill():
+    slow = extraction._submit(time.sleep, 3, timeout=10)
+    with pytest.raises(multiprocessing.TimeoutError):
+        extraction._run_task(emit_then_hang, (0,), 1)
+    assert slow.result() is None
+
+
+def test_text_files_and_limits():
+    stats = {}
+    assert extraction.extract_text(b'  Jane Doe\nPython  ', 'cv.txt', stats) == 'Jane Doe\nPython'
+    assert stats == {}
+    with pytest.raises(ValueError):
+        extraction.extract_text(b'x' * (extraction.MAX_UPLOAD_BYTES + 1), 'cv.txt')
+
+
+def test_resume_without_text_is_not_stored(conn):
+    from analysis import analyze_resume
+
+    with pytest.raises(ValueError, match='No text'):
+        analyze_resume(1, 'blank.txt', b'  \n ', 'Python developer')
+    assert conn.execute('SELECT COUNT(*) FROM files').fetchone()[0] == 0
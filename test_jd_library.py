@@ -0,0 +1,30 @@
+import json
+
+from db import run_in_transaction
+from jd_library import hash_jd_text, load_jd, publish_jd
+from scoring import CorpusModel
+
+JD = 'Data Analyst\nSkills: Advanced Excel, SQL and Tableau'
+
+
+def publish(conn, text=JD):
+    model = CorpusModel()
+    model.load(conn)
+    return model, run_in_transaction(publish_jd, model, 'Analyst', text, None)
+
+
+def test_load_returns_the_published_inputs(conn):
+    model, job_id = publish(conn)
+    text, text_hash, (vec, terms, skills) = load_jd(conn, model, job_id)
+    assert text == JD and text_hash == hash_jd_text(' data analyst  SKILLS: advanced excel, sql and tableau')
+    assert vec.nnz and 'tableau' in terms.values()
+    assert skills == {'microsoft excel': 1, 'sql': 1, 'tableau': 1}
+    assert load_jd(conn, model, job_id + 1) is None
+
+
+def test_skills_from_an_older_taxonomy_are_found_again(conn):
+    model, job_id = publish(conn)
+    conn.execute("UPDATE jobs SET skills = ?, skills_version = 'old' WHERE id = ?",
+                 (json.dumps({'excel': 1, 'sql': 1}), job_id))
+    conn.commit()
+    assert load_jd(conn, model, job_id)[2][2] == {'microsoft excel': 1, 'sql': 1, 'tableau': 1}
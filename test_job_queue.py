@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+import analysis
+import job_queue
+from job_queue import get_job
+
+
+def add_job(conn, status, age):
+    job_id = conn.execute(
+        "INSERT INTO analysis_jobs (user_id, filename, status, updated_at) VALUES (1, 'cv.pdf', ?, datetime('now', ?))",
+        (status, f'-{age} seconds')
+    ).lastrowid
+    conn.commit()
+    return job_id
+
+
+@pytest.mark.parametrize('status, age, reported', [
+    ('running', 10, 'running'),
+    ('queued', job_queue.STALE_JOB_SECONDS + 60, 'failed'),
+    ('running', job_queue.STALE_JOB_SECONDS + 60, 'failed'),
+    ('done', job_queue.STALE_JOB_SECONDS + 60, 'done'),
+])
+def test_stale_jobs_are_reported_failed(conn, status, age, reported):
+    job = get_job(conn, add_job(conn, status, age), 1)
+    assert job['status'] == reported
+    assert (job['error'] is not None) == (reported == 'failed')
+
+
+def test_jobs_belong_to_their_user(conn):
+    assert get_job(conn, add_job(conn, 'running', 10), 2) is None
+
+
+@pytest.fixture
+def flaky_updates(monkeypatch):
+    # _update_job that fails with a busy DB until `busy` attempts have been made
+    calls = []
+    monkeypatch.setattr(job_queue, 'FAIL_BACKOFF', 0)
+
+    def update(job_id, **fields):
+        calls.append(fields)
+        if fields.get('status') in ('failed', 'done') and len(calls) <= update.busy:
+            raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(job_queue, '_update_job', update)
+    return update, calls
+
+
+def test_failure_is_recorded_despite_a_busy_db(monkeypatch, flaky_updates):
+    update, calls = flaky_updates
+    update.busy = 3
+    monkeypatch.setattr(analysis, 'analyze_resume', lambda *args, **kwargs: {'score': 1})
+    job_queue._run_job(1, 1, 'cv.pdf', b'', '', None, None, None)
+    assert [c.get('status') for c in calls] == ['running', 'done', 'failed', 'failed']
+
+
+def test_failure_that_cannot_be_recorded_is_logged(monkeypatch, flaky_updates, caplog):
+    update, calls = flaky_updates
+    update.busy = 100
+
+    def fail(*args, **kwargs):
+        raise ValueError("No text could be extracted from the resume")
+
+    monkeypatch.setattr(analysis, 'analyze_resume', fail)
+    job_queue._run_job(1, 1, 'cv.pdf', b'', '', None, None, None)
+    assert len(calls) == 1 + job_queue.FAIL_RETRIES
+    assert 'could not record the failure of analysis job 1' in caplog.text
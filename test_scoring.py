@@ -0,0 +1,66 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import db
+import scoring
+from scoring import CorpusModel, rank_resumes, resume_matrix
+
+
+def add_resume(conn, text):
+    cur = conn.execute("INSERT INTO files (filename, file_type, analysis_score, metadata) VALUES ('cv.pdf', 'resume', 50, '{}')")
+    conn.execute('INSERT INTO resume_text (file_id, text) VALUES (?, ?)', (cur.lastrowid, text))
+    conn.commit()
+    return cur.lastrowid
+
+
+@pytest.fixture
+def model(conn, monkeypatch):
+    monkeypatch.setattr(scoring, '_resumes', None)
+    model = CorpusModel()
+    model.load(conn)
+    return model
+
+
+def test_new_resumes_are_appended_once(conn, model):
+    first = add_resume(conn, 'python developer with django')
+    assert resume_matrix(conn, model)[0].tolist() == [first]
+    second = add_resume(conn, 'java developer with spring boot')
+    ids, X, superseded = resume_matrix(conn, model)
+    assert ids.tolist() == [first, second]
+    assert X.shape[0] == 2 and not superseded.any()
+
+
+def test_resume_committed_mid_read_is_not_appended_twice(conn, model):
+    add_resume(conn, 'python developer with django')
+    resume_matrix(conn, model)
+    add_resume(conn, 'java developer with spring boot')
+    other = sqlite3.connect(db.DATABASE)
+
+    def commit_during_fetch(sql):
+        # Another writer commits between the MAX(id) read and the fetch of new rows
+        if 'f.id >' in sql:
+            conn.set_trace_callback(None)
+            other.execute("INSERT INTO files (filename, file_type, analysis_score, metadata) VALUES (?, 'resume', 50, ?)",
+                          ('late.pdf', '{"text": "late arrival"}'))
+            other.commit()
+
+    conn.set_trace_callback(commit_during_fetch)
+    resume_matrix(conn, model)
+    ids = resume_matrix(conn, model)[0].tolist()
+    other.close()
+    assert ids == sorted(set(ids)) and len(ids) == 3
+
+
+def test_rank_resumes_orders_by_fit_and_collapses(conn, model):
+    python = add_resume(conn, 'python django flask python developer')
+    java = add_resume(conn, 'java spring developer')
+    newer = add_resume(conn, 'python django developer')
+    conn.execute('UPDATE files SET superseded = 1 WHERE id = ?', (python,))
+    conn.commit()
+    ranked = rank_resumes(conn, model, 'python django', collapse=False)
+    assert sorted(row['id'] for row in ranked[:2]) == [python, newer]
+    assert ranked[-1]['id'] == java and ranked[-1]['score'] == 0
+    assert [row['id'] for row in rank_resumes(conn, model, 'python django')] == [newer, java]
+    assert rank_resumes(conn, model, '') == []
@@ -0,0 +1,127 @@
+import random
+import re
+
+import pytest
+
+from document import Document
+from skills import SkillMatcher, get_matcher, ranked, skill_match
+
+
+def naive_find(taxonomy, text):
+    """Reference result: every pattern tried at every offset with the same boundary rule."""
+    owner = {}
+    for canonical, synonyms in taxonomy.items():
+        for pattern in [canonical, *synonyms]:
+            owner.setdefault(pattern, canonical)
+    found = {}
+    for pattern, canonical in owner.items():
+        rx = re.compile(r'(?<!\w)(?<!\w\.)(?=' + re.escape(pattern) + r'(?!\w)(?!\.\w))')
+        hits = len(rx.findall(text))
+        if hits:
+            found[canonical] = found.get(canonical, 0) + hits
+    return found
+
+
+def test_word_boundaries():
+    m = SkillMatcher({'java': [], 'javascript': ['js'], 'c++': [], 'c#': []})
+    assert m.find('JavaScript and Java') == {'javascript': 1, 'java': 1}
+    assert m.find('javas, java_ee, myjava') == {}
+    assert m.find('C++, c#; js.') == {'c++': 1, 'c#': 1, 'javascript': 1}
+
+
+def test_dotted_names_are_one_word():
+    m = SkillMatcher({'javascript': ['js'], 'node.js': ['nodejs'], 'react': ['react.js']})
+    assert m.find('Node.js and React.js') == {'node.js': 1, 'react': 1}
+    assert m.find('Built it in React. Then JS.') == {'react': 1, 'javascript': 1}
+
+
+def test_failure_links_resume_a_partial_match():
+    # "abcd" fails at "e"; the scan must fall back to "bc" rather than restart after it
+    m = SkillMatcher({'a bcd': [], 'bce': []})
+    assert m.find('a bce') == {'bce': 1}
+    assert m.find('a bcd') == {'a bcd': 1}
+
+
+def test_output_links_report_nested_patterns():
+    m = SkillMatcher({'sql server': [], 'sql': [], 'server': []})
+    assert m.find('sql server') == {'sql server': 1, 'sql': 1, 'server': 1}
+    assert m.find('mysql') == {}
+
+
+def test_synonyms_count_towards_the_canonical_skill():
+    m = SkillMatcher({'kubernetes': ['k8s'], 'machine learning': ['ml']})
+    found = m.find('K8s,  Kubernetes and Machine\n  Learning (ML)')
+    assert found == {'kubernetes': 2, 'machine learning': 2}
+    assert list(found) == ['kubernetes', 'machine learning']
+
+
+def test_a_name_inside_a_longer_name_of_the_same_skill_counts_once():
+    m = SkillMatcher({'apache kafka': ['kafka'], 'microsoft excel': ['advanced excel'], 'rust programming': ['rust lang']},
+                     {'microsoft excel': ['excel'], 'rust programming': ['rust']})
+    assert m.find('Apache Kafka, Advanced Excel, Excel, Rust lang') == {
+        'apache kafka': 1, 'microsoft excel': 2, 'rust programming': 1}
+
+
+def test_first_taxonomy_entry_wins_a_name_clash():
+    m = SkillMatcher({'golang': ['go'], 'go': []})
+    assert m.find('go') == {'golang': 1}
+
+
+def test_find_doc_matches_find():
+    m = get_matcher()
+    raw = 'Skills: Python, SQL Server,\nDocker and Kubernetes (k8s).'
+    assert m.find_doc(Document(raw)) == m.find(raw)
+
+
+@pytest.mark.parametrize('text', [
+    'I excel at working under pressure',
+    'Able to express ideas clearly and deliver swift results',
+    'Removed rust from the frame; sparked a new spring campaign',
+    'Agile learner with strong written communication',
+])
+def test_taxonomy_ignores_ordinary_english(text):
+    found = get_matcher().find(text)
+    assert set(found) <= {'communication'}
+
+
+def test_list_only_names_need_a_list():
+    m = SkillMatcher({'apache spark': ['pyspark']}, {'apache spark': ['spark']})
+    assert m.find('sparked interest; a spark of genius') == {}
+    assert m.find('Tools: Spark') == {'apache spark': 1}
+    assert m.find('Hadoop, Spark and Hive') == {'apache spark': 1}
+    assert m.find('Hadoop | spark') == {'apache spark': 1}
+    assert m.find('Summary\nI bring a spark to teams\nSkills\nSpark and Hive') == {'apache spark': 1}
+    assert m.find('PySpark') == {'apache spark': 1}
+
+
+def test_bare_names_in_a_skills_list_match_the_qualified_jd():
+    m = get_matcher()
+    resume = m.find('Experience\nI excel at data work\nSkills: Spark, Excel, Rust, Agile, Kafka')
+    jd = m.find('Apache Spark, Advanced Excel, Rust language, Agile methodology')
+    assert skill_match(resume, jd) == (['apache spark', 'microsoft excel', 'rust programming', 'agile methodology'], [])
+    assert m.find('Skills\nSwift\nExpress') == {'swift programming': 1, 'express.js': 1}
+
+
+def test_taxonomy_matches_qualified_names():
+    found = get_matcher().find('Advanced Excel, Express.js, SwiftUI, Rust programming, PySpark')
+    assert set(found) == {'microsoft excel', 'express.js', 'swift programming', 'rust programming',
+                          'apache spark'}
+
+
+def test_matches_reference_on_random_text():
+    rng = random.Random(7)
+    for _ in range(300):
+        taxonomy = {}
+        for _ in range(rng.randint(1, 6)):
+            words = [''.join(rng.choice('ab') for _ in range(rng.randint(1, 3)))
+                     for _ in range(rng.randint(1, 2))]
+            taxonomy.setdefault(' '.join(words), [])
+        text = ''.join(rng.choice('ab. ') for _ in range(40))
+        text = ' '.join(text.split())
+        assert dict(SkillMatcher(taxonomy).scan(text)) == naive_find(taxonomy, text), (taxonomy, text)
+
+
+def test_skill_match_orders_by_jd_frequency():
+    jd = get_matcher().find('Python, SQL, Docker. Python and SQL daily. Python.')
+    assert ranked(jd) == ['python', 'sql', 'docker']
+    assert skill_match({'sql': 1}, jd) == (['sql'], ['python', 'docker'])